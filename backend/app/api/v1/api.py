@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, user, chat, conversations, mood, exercises, resources
+from app.api.v1.endpoints import auth, users, user, chat, conversations, mood, exercises, resources, knowledge
 
 api_router = APIRouter()
 
@@ -11,4 +11,5 @@ api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 api_router.include_router(conversations.router, prefix="/conversations", tags=["conversations"])
 api_router.include_router(mood.router, prefix="/mood", tags=["mood"])
 api_router.include_router(exercises.router, prefix="/exercises", tags=["exercises"])
-api_router.include_router(resources.router, prefix="/resources", tags=["resources"])
\ No newline at end of file
+api_router.include_router(resources.router, prefix="/resources", tags=["resources"])
+api_router.include_router(knowledge.router, prefix="/knowledge", tags=["knowledge"])
\ No newline at end of file
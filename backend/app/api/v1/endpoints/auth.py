@@ -13,27 +13,53 @@ from app.core.security import (
     generate_verification_token
 )
 from app.core.database import get_users_collection, get_sessions_collection
-from app.models.user import UserCreate, UserLogin, Token, User, UserResponse
+from app.models.user import UserCreate, UserLogin, Token, User, UserResponse, Principal, PRINCIPAL_PROJECTION
 from app.core.config import settings
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _token_username(token: str) -> str:
+    """Username a valid access token was issued to"""
     payload = decode_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     username: str = payload.get("sub")
     if username is None:
+        raise _credentials_exception()
+    return username
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Get the authenticated caller with a projected user lookup"""
+    credentials_exception = _credentials_exception()
+    username = _token_username(token)
+    
+    try:
+        users_collection = get_users_collection()
+        user = await users_collection.find_one({"username": username}, PRINCIPAL_PROJECTION)
+        
+        if user is None:
+            raise credentials_exception
+        
+        user["id"] = str(user.pop("_id"))
+        return Principal(**user)
+        
+    except (RuntimeError, Exception):
+        # Database not available
         raise credentials_exception
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """Get current authenticated user with the full profile"""
+    credentials_exception = _credentials_exception()
+    username = _token_username(token)
     
     try:
         # Try to get user from database
@@ -85,7 +111,6 @@ async def register(user_data: UserCreate):
             user_dict["risk_level"] = "low"
             user_dict["total_sessions"] = 0
             user_dict["streak_days"] = 0
-            user_dict["mood_history"] = []
             user_dict["primary_concerns"] = []
             user_dict["therapy_goals"] = []
             user_dict["completed_exercises"] = []
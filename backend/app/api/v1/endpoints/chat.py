@@ -3,12 +3,13 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from loguru import logger
 from bson import ObjectId
-from app.api.v1.endpoints.auth import get_current_user
-from app.models.user import User
+from app.api.v1.endpoints.auth import get_current_principal
+from app.models.user import Principal
 from app.models.conversation import Message, MessageRole, Conversation, ConversationCreate, EmotionalTone
 from app.core.database import get_conversations_collection, get_users_collection
-from app.rag.simple_rag import simple_rag_engine as rag_engine
+from app.rag.simple_rag import get_simple_rag_engine
 from app.mental_health.mood_detector import mood_detector, crisis_intervention
+from app.mental_health.mood_history import mood_history_store
 from app.core.security import sanitize_user_input, mask_sensitive_info
 import json
 import asyncio
@@ -50,7 +51,7 @@ class MessageRequest(BaseModel):
 @router.post("/message")
 async def send_message(
     request: MessageRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Send message and get AI response"""
     try:
@@ -121,6 +122,7 @@ async def send_message(
             # Perform mood detection
             try:
                 mood_analysis = mood_detector.detect_mood(message)
+                mood_analysis = await mood_detector.refine_emotions(message, mood_analysis)
             except:
                 mood_analysis = {
                     "mood_state": "neutral",
@@ -133,7 +135,7 @@ async def send_message(
                 crisis_assessment = crisis_intervention.assess_crisis(
                     message,
                     {
-                        "recent_crisis_flags": len(current_user.crisis_flags),
+                        "recent_crisis_flags": current_user.crisis_flag_count,
                         "risk_level": current_user.risk_level
                     }
                 )
@@ -160,12 +162,13 @@ async def send_message(
             "current_mood": getattr(current_user, 'current_mood', None),
             "primary_concerns": getattr(current_user, 'primary_concerns', []),
             "risk_level": getattr(current_user, 'risk_level', 'low'),
-            "therapy_goals": getattr(current_user, 'therapy_goals', [])
+            "therapy_goals": getattr(current_user, 'therapy_goals', []),
+            "detected_emotions": list(mood_analysis.get("emotions") or {})
         }
         
         # Generate AI response
         try:
-            ai_response = await rag_engine.generate_response(
+            ai_response = await get_simple_rag_engine().generate_response(
                 user_message=message,
                 conversation_history=conversation_history,
                 is_crisis=crisis_assessment["requires_immediate_intervention"],
@@ -214,10 +217,17 @@ What would be most helpful for you right now?""",
         }
         user_emotional_tone = emotional_tone_mapping.get(mood_state, EmotionalTone.NEUTRAL)
         
+        # Per-message scores are stored so conversation analysis never re-scores text
+        crisis_keywords = mood_analysis.get("crisis_keywords_detected") or []
         user_message = Message(
             role=MessageRole.USER,
             content=message,
             emotional_tone=user_emotional_tone,
+            sentiment_score=mood_analysis["sentiment_scores"]["compound"],
+            emotion_scores=mood_analysis.get("emotions") or {},
+            contains_crisis_language=bool(crisis_keywords),
+            crisis_keywords_detected=crisis_keywords,
+            crisis_level=mood_analysis.get("crisis_level"),
             timestamp=datetime.utcnow()
         )
         
@@ -264,23 +274,25 @@ What would be most helpful for you right now?""",
                 {"$set": update_data}
             )
             
-            # Update user's mood history
-            await users_collection.update_one(
-                {"_id": ObjectId(current_user.id)},
-                {
-                    "$push": {
-                        "mood_history": {
-                            "timestamp": datetime.utcnow(),
-                            "mood_state": mood_analysis.get("mood_state"),
-                            "sentiment_score": mood_analysis["sentiment_scores"]["compound"]
-                        }
-                    },
-                    "$set": {
-                        "current_mood": mood_analysis.get("mood_state"),
-                        "last_activity": datetime.utcnow()
-                    },
-                    "$inc": {"total_sessions": 1}
-                }
+            # Record the mood point and update the user's current mood together
+            now = datetime.utcnow()
+            await asyncio.gather(
+                mood_history_store.record(
+                    current_user.id,
+                    mood_analysis.get("mood_state"),
+                    mood_analysis["sentiment_scores"]["compound"],
+                    timestamp=now
+                ),
+                users_collection.update_one(
+                    {"_id": ObjectId(current_user.id)},
+                    {
+                        "$set": {
+                            "current_mood": mood_analysis.get("mood_state"),
+                            "last_activity": now
+                        },
+                        "$inc": {"total_sessions": 1}
+                    }
+                )
             )
         
         response = {
@@ -346,6 +358,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             
             # Process with mood detection
             mood_analysis = mood_detector.detect_mood(message)
+            mood_analysis = await mood_detector.refine_emotions(message, mood_analysis)
             
             # Check for crisis
             crisis_assessment = crisis_intervention.assess_crisis(
@@ -372,14 +385,15 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
                 })
             
             # Generate AI response
-            ai_response = await rag_engine.generate_response(
+            ai_response = await get_simple_rag_engine().generate_response(
                 user_message=message,
                 conversation_history=[],
                 is_crisis=crisis_assessment["requires_immediate_intervention"],
                 user_context={
                     "current_mood": user.get("current_mood"),
                     "primary_concerns": user.get("primary_concerns", []),
-                    "risk_level": user.get("risk_level", "low")
+                    "risk_level": user.get("risk_level", "low"),
+                    "detected_emotions": list(mood_analysis.get("emotions") or {})
                 }
             )
             
@@ -405,7 +419,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         manager.disconnect(user_id)
 
 @router.get("/suggested-prompts")
-async def get_suggested_prompts(current_user: User = Depends(get_current_user)):
+async def get_suggested_prompts(current_user: Principal = Depends(get_current_principal)):
     """Get suggested conversation prompts based on user profile"""
     try:
         prompts = []
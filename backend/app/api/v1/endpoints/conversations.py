@@ -2,10 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
 from datetime import datetime, timedelta
 from loguru import logger
-from app.api.v1.endpoints.auth import get_current_user
-from app.models.user import User
+from app.api.v1.endpoints.auth import get_current_principal
+from app.models.user import Principal
 from app.models.conversation import ConversationResponse, ConversationSummary
 from app.core.database import get_conversations_collection
+from app.mental_health.conversation_analyzer import conversation_analyzer
 
 router = APIRouter()
 
@@ -13,7 +14,7 @@ router = APIRouter()
 async def get_conversations(
     limit: int = Query(10, ge=1, le=50),
     skip: int = Query(0, ge=0),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get user's conversations"""
     try:
@@ -37,7 +38,7 @@ async def get_conversations(
 @router.get("/{conversation_id}")
 async def get_conversation(
     conversation_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get specific conversation with full details"""
     try:
@@ -65,10 +66,42 @@ async def get_conversation(
             detail="Failed to retrieve conversation"
         )
 
+@router.get("/{conversation_id}/analysis")
+async def get_conversation_analysis(
+    conversation_id: str,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Mood trajectory, dominant emotions and risk for a conversation"""
+    try:
+        conversations_collection = get_conversations_collection()
+        
+        conversation = await conversations_collection.find_one(
+            {"id": conversation_id, "user_id": current_user.id},
+            {"messages.role": 1, "messages.content": 1, "messages.sentiment_score": 1,
+             "messages.emotion_scores": 1, "messages.contains_crisis_language": 1, "messages.crisis_level": 1}
+        )
+        
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+        
+        return conversation_analyzer.analyze(conversation.get("messages", []))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to analyze conversation: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to analyze conversation"
+        )
+
 @router.delete("/{conversation_id}")
 async def delete_conversation(
     conversation_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Delete a conversation"""
     try:
@@ -99,7 +132,7 @@ async def delete_conversation(
 @router.get("/summary/recent", response_model=List[ConversationSummary])
 async def get_recent_summaries(
     days: int = Query(7, ge=1, le=30),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get summaries of recent conversations"""
     try:
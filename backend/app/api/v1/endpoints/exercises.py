@@ -2,10 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
 from datetime import datetime
 from loguru import logger
-from app.api.v1.endpoints.auth import get_current_user
-from app.models.user import User
+from app.api.v1.endpoints.auth import get_current_principal
+from app.models.user import Principal
 from app.core.database import get_exercises_collection, get_users_collection
-from app.rag.simple_rag import simple_rag_engine as rag_engine
+from app.rag.simple_rag import get_simple_rag_engine
 
 router = APIRouter()
 
@@ -14,7 +14,7 @@ async def get_exercises(
     category: Optional[str] = None,
     difficulty: Optional[str] = Query(None, regex="^(beginner|intermediate|advanced)$"),
     limit: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get therapeutic exercises"""
     try:
@@ -49,12 +49,12 @@ async def get_exercises(
 async def generate_exercise(
     concern: str,
     difficulty: str = Query("beginner", regex="^(beginner|intermediate|advanced)$"),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Generate personalized therapeutic exercise"""
     try:
         # Generate exercise using AI
-        exercise = await rag_engine.generate_therapeutic_exercise(concern, difficulty)
+        exercise = await get_simple_rag_engine().generate_therapeutic_exercise(concern, difficulty)
         
         # Save to database for future use
         exercises_collection = get_exercises_collection()
@@ -83,7 +83,7 @@ async def complete_exercise(
     exercise_id: str,
     feedback: Optional[str] = None,
     helpful: bool = True,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Mark exercise as completed"""
     try:
@@ -115,7 +115,7 @@ async def complete_exercise(
 
 @router.get("/recommended")
 async def get_recommended_exercises(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get AI-recommended exercises based on user profile"""
     try:
@@ -123,7 +123,7 @@ async def get_recommended_exercises(
         
         # Generate recommendations based on user's concerns
         for concern in current_user.primary_concerns[:3]:  # Top 3 concerns
-            exercise = await rag_engine.generate_therapeutic_exercise(
+            exercise = await get_simple_rag_engine().generate_therapeutic_exercise(
                 concern, 
                 "beginner"  # Start with beginner exercises
             )
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from pathlib import Path
+from loguru import logger
+from pydantic import BaseModel
+from app.api.v1.endpoints.auth import get_current_principal
+from app.models.user import Principal, UserRole
+from app.core.config import settings
+from app.rag.rag_engine import get_rag_engine
+from app.rag.ingestion import KnowledgeIngestor
+
+router = APIRouter()
+
+class IngestRequest(BaseModel):
+    path: Optional[str] = None  # subdirectory of KNOWLEDGE_INGEST_ROOT
+    dry_run: bool = False
+
+@router.post("/ingest")
+async def ingest_knowledge(
+    request: IngestRequest,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Incrementally ingest the knowledge directory"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    root = settings.KNOWLEDGE_INGEST_ROOT.resolve()
+    target = (root / request.path).resolve() if request.path else root
+    
+    # Never read outside the configured root
+    if target != root and root not in target.parents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Path must be inside the knowledge directory"
+        )
+    
+    if not target.is_dir():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Knowledge directory not found"
+        )
+    
+    try:
+        ingestor = KnowledgeIngestor(get_rag_engine())
+        return await ingestor.ingest(target, dry_run=request.dry_run)
+        
+    except Exception as e:
+        logger.error(f"Knowledge ingestion error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Knowledge ingestion failed"
+        )
+
+@router.get("/stats")
+async def knowledge_stats(current_user: Principal = Depends(get_current_principal)):
+    """Embedding cache, retrieval cache and query coalescing metrics"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return get_rag_engine().embedding_stats()
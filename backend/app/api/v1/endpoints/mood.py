@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set, Tuple
 from datetime import datetime, timedelta
 from loguru import logger
 from bson import ObjectId
-from app.api.v1.endpoints.auth import get_current_user
-from app.models.user import User, MoodState
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from app.api.v1.endpoints.auth import get_current_principal
+from app.models.user import Principal, MoodState
+from app.core.config import settings
 from app.core.database import get_users_collection, get_mood_logs_collection
 from app.mental_health.mood_detector import mood_detector
+from app.mental_health.mood_history import mood_history_store
+import asyncio
 
 router = APIRouter()
 
@@ -22,10 +27,59 @@ class MoodLogRequest(BaseModel):
     stress_level: int
     date: str
 
+def mood_log_upsert(user_id: str, mood_data: MoodLogRequest, now: datetime) -> UpdateOne:
+    """Upsert keyed on (user_id, date): one entry per user per day"""
+    return UpdateOne(
+        {"user_id": user_id, "date": mood_data.date},
+        {"$set": {
+            "mood": mood_data.mood,
+            "score": mood_data.score,
+            "notes": mood_data.notes,
+            "energy_level": mood_data.energy_level,
+            "sleep_quality": mood_data.sleep_quality,
+            "stress_level": mood_data.stress_level,
+            "timestamp": now
+        }},
+        upsert=True
+    )
+
+async def write_mood_logs(collection, operations: List[UpdateOne]) -> Tuple[Set[int], Dict[int, str]]:
+    """Run mood-log upserts unordered; returns (indexes that inserted, errors by index)
+    
+    Two requests upserting the same new (user_id, date) can both try to
+    insert; the unique index rejects one with a duplicate key error. Those
+    are retried once, when the upsert matches the winner's document and
+    updates it.
+    """
+    upserted: Set[int] = set()
+    errors: Dict[int, str] = {}
+    pending = list(range(len(operations)))
+    
+    for attempt in range(2):
+        try:
+            result = await collection.bulk_write([operations[i] for i in pending], ordered=False)
+            upserted.update(pending[i] for i in result.upserted_ids)
+            break
+        except BulkWriteError as e:
+            # Unordered: every other operation was still attempted
+            upserted.update(pending[item["index"]] for item in e.details.get("upserted", []))
+            retry = []
+            for error in e.details.get("writeErrors", []):
+                position = pending[error["index"]]
+                if error.get("code") == 11000 and attempt == 0:
+                    retry.append(position)
+                else:
+                    errors[position] = error.get("errmsg", "write failed")
+            if not retry:
+                break
+            pending = retry
+    
+    return upserted, errors
+
 @router.post("/log")
 async def log_mood(
     mood_data: MoodLogRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Log current mood"""
     try:
@@ -33,40 +87,17 @@ async def log_mood(
             users_collection = get_users_collection()
             mood_logs_collection = get_mood_logs_collection()
             
-            # Create mood log
-            mood_log = {
-                "user_id": current_user.id,
-                "date": mood_data.date,
-                "mood": mood_data.mood,
-                "score": mood_data.score,
-                "notes": mood_data.notes,
-                "energy_level": mood_data.energy_level,
-                "sleep_quality": mood_data.sleep_quality,
-                "stress_level": mood_data.stress_level,
-                "timestamp": datetime.utcnow()
-            }
-            
-            # Check if entry already exists for this date
-            existing_entry = await mood_logs_collection.find_one({
-                "user_id": current_user.id,
-                "date": mood_data.date
-            })
-            
-            if existing_entry:
-                # Update existing entry
-                await mood_logs_collection.update_one(
-                    {"user_id": current_user.id, "date": mood_data.date},
-                    {"$set": mood_log}
+            # Upsert the day's entry and update the user's current mood together
+            upsert = mood_log_upsert(current_user.id, mood_data, datetime.utcnow())
+            (_, errors), _ = await asyncio.gather(
+                write_mood_logs(mood_logs_collection, [upsert]),
+                users_collection.update_one(
+                    {"_id": ObjectId(current_user.id)},
+                    {"$set": {"current_mood": mood_data.mood}}
                 )
-            else:
-                # Create new entry
-                await mood_logs_collection.insert_one(mood_log)
-            
-            # Update user's current mood
-            await users_collection.update_one(
-                {"_id": ObjectId(current_user.id)},
-                {"$set": {"current_mood": mood_data.mood}}
             )
+            if errors:
+                raise OperationFailure(errors[0])
             
         except RuntimeError:
             # Database not available
@@ -86,11 +117,87 @@ async def log_mood(
             detail="Failed to log mood"
         )
 
+@router.post("/log/bulk")
+async def log_mood_bulk(
+    entries: List[MoodLogRequest],
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Log many mood entries (e.g. an offline sync) in one round trip"""
+    if len(entries) > settings.MOOD_BULK_MAX_ENTRIES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.MOOD_BULK_MAX_ENTRIES} entries per request"
+        )
+    
+    # Later entries for the same date win; concurrent upserts on one key could insert twice
+    latest: Dict[str, int] = {}
+    for index, entry in enumerate(entries):
+        latest[entry.date] = index
+    positions = sorted(latest.values())
+    
+    results: List[Dict[str, Any]] = [
+        {"index": index, "date": entry.date, "status": "superseded"}
+        for index, entry in enumerate(entries)
+    ]
+    
+    try:
+        mood_logs_collection = get_mood_logs_collection()
+        users_collection = get_users_collection()
+    except RuntimeError:
+        logger.warning("Database not available")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database not available"
+        )
+    
+    if positions:
+        now = datetime.utcnow()
+        operations = [mood_log_upsert(current_user.id, entries[index], now) for index in positions]
+        
+        try:
+            upserted, errors = await write_mood_logs(mood_logs_collection, operations)
+        except Exception as e:
+            logger.error(f"Bulk mood logging error: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to log moods"
+            )
+        
+        for operation_index, index in enumerate(positions):
+            if operation_index in errors:
+                results[index].update(status="failed", error=errors[operation_index])
+            else:
+                results[index]["status"] = "inserted" if operation_index in upserted else "updated"
+        
+        written = [index for operation_index, index in enumerate(positions) if operation_index not in errors]
+        if written:
+            newest = max(written, key=lambda index: entries[index].date)
+            try:
+                await users_collection.update_one(
+                    {"_id": ObjectId(current_user.id)},
+                    {"$set": {"current_mood": entries[newest].mood}}
+                )
+            except Exception as e:
+                logger.warning(f"Failed to update current mood after bulk log: {e}")
+    
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    
+    return {
+        "received": len(entries),
+        "inserted": counts.get("inserted", 0),
+        "updated": counts.get("updated", 0),
+        "superseded": counts.get("superseded", 0),
+        "failed": counts.get("failed", 0),
+        "results": results
+    }
+
 @router.get("/entries")
 async def get_mood_entries(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get mood entries for user"""
     from datetime import date
@@ -129,7 +236,7 @@ async def get_mood_entries(
 @router.get("/history")
 async def get_mood_history(
     days: int = Query(30, ge=1, le=365),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get mood history"""
     try:
@@ -169,22 +276,26 @@ async def get_mood_history(
 
 @router.get("/analysis")
 async def get_mood_analysis(
-    current_user: User = Depends(get_current_user)
+    days: int = Query(settings.MOOD_HISTORY_ANALYSIS_DAYS, ge=1, le=365),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get mood analysis and trends"""
     try:
-        # Get user's mood history
-        users_collection = get_users_collection()
-        user = await users_collection.find_one({"_id": ObjectId(current_user.id)})
+        # Get a bounded window of the user's mood history
+        mood_history = await mood_history_store.recent(
+            current_user.id,
+            days=days,
+            limit=settings.MOOD_HISTORY_ANALYSIS_MAX_ENTRIES
+        )
         
-        if not user or not user.get("mood_history"):
+        if not mood_history:
             return {
                 "trend": "insufficient_data",
                 "message": "Not enough mood data for analysis"
             }
         
         # Analyze mood progression
-        analysis = mood_detector.analyze_mood_progression(user["mood_history"])
+        analysis = mood_detector.analyze_mood_progression(mood_history)
         
         return analysis
         
@@ -195,6 +306,30 @@ async def get_mood_analysis(
             detail="Failed to analyze mood"
         )
 
+def check_in_streak_update(now: datetime) -> List[Dict[str, Any]]:
+    """Pipeline update advancing streak_days from the stored last_checkin_date
+    
+    Both fields are set in one $set stage, so the streak expression sees the
+    previous check-in date.
+    """
+    today = datetime(now.year, now.month, now.day)
+    yesterday = today - timedelta(days=1)
+    return [
+        {"$set": {
+            "streak_days": {"$switch": {
+                "branches": [
+                    # Already checked in today: unchanged
+                    {"case": {"$gte": ["$last_checkin_date", today]}, "then": {"$ifNull": ["$streak_days", 1]}},
+                    # Consecutive day
+                    {"case": {"$gte": ["$last_checkin_date", yesterday]}, "then": {"$add": [{"$ifNull": ["$streak_days", 0]}, 1]}}
+                ],
+                # First check-in or streak broken
+                "default": 1
+            }},
+            "last_checkin_date": now
+        }}
+    ]
+
 @router.post("/check-in")
 async def daily_check_in(
     mood: MoodState,
@@ -202,31 +337,26 @@ async def daily_check_in(
     sleep_quality: int = Query(..., ge=1, le=10),
     stress_level: int = Query(..., ge=1, le=10),
     notes: str = "",
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Daily mental health check-in"""
     try:
         mood_logs_collection = get_mood_logs_collection()
         users_collection = get_users_collection()
         
-        # Get current user data
-        user = await users_collection.find_one({"_id": ObjectId(current_user.id)})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        now = datetime.utcnow()
         
         # Create comprehensive check-in
         check_in = {
             "user_id": current_user.id,
             "type": "daily_check_in",
+            "checkin_date": now.date().isoformat(),
             "mood": mood,
             "energy_level": energy_level,
             "sleep_quality": sleep_quality,
             "stress_level": stress_level,
             "notes": notes,
-            "timestamp": datetime.utcnow()
+            "timestamp": now
         }
         
         # Analyze if notes provided
@@ -234,45 +364,37 @@ async def daily_check_in(
             analysis = mood_detector.detect_mood(notes)
             check_in["sentiment_analysis"] = analysis
         
-        # Save check-in
-        await mood_logs_collection.insert_one(check_in)
-        
-        # Update user streak
-        last_checkin = user.get("last_checkin_date")
-        today = datetime.utcnow().date()
-        
-        if last_checkin:
-            last_date = last_checkin.date()
-            if (today - last_date).days == 1:
-                # Consecutive day - increase streak
-                await users_collection.update_one(
-                    {"_id": ObjectId(current_user.id)},
-                    {"$inc": {"streak_days": 1}}
-                )
-            elif (today - last_date).days > 1:
-                # Streak broken - reset to 1
-                await users_collection.update_one(
-                    {"_id": ObjectId(current_user.id)},
-                    {"$set": {"streak_days": 1}}
-                )
-        else:
-            # First check-in
-            await users_collection.update_one(
-                {"_id": ObjectId(current_user.id)},
-                {"$set": {"streak_days": 1}}
+        # Advance the streak server-side; it doubles as the user lookup
+        user = await users_collection.find_one_and_update(
+            {"_id": ObjectId(current_user.id)},
+            check_in_streak_update(now),
+            projection={"streak_days": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
             )
         
-        # Update last check-in date
-        await users_collection.update_one(
-            {"_id": ObjectId(current_user.id)},
-            {"$set": {"last_checkin_date": datetime.utcnow()}}
+        # Save check-in only for an existing user, one per day. A retry after a
+        # failed save leaves the streak as it is and still stores the check-in.
+        upsert = UpdateOne(
+            {"user_id": current_user.id, "type": "daily_check_in", "checkin_date": check_in["checkin_date"]},
+            {"$set": check_in},
+            upsert=True
         )
+        _, errors = await write_mood_logs(mood_logs_collection, [upsert])
+        if errors:
+            raise OperationFailure(errors[0])
         
         return {
             "message": "Check-in completed successfully",
-            "streak_days": user.get("streak_days", 1) + 1
+            "streak_days": user["streak_days"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Check-in error: {e}")
         raise HTTPException(
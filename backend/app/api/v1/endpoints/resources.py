@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
 from datetime import datetime
 from loguru import logger
-from app.api.v1.endpoints.auth import get_current_user
-from app.models.user import User
+from app.api.v1.endpoints.auth import get_current_principal
+from app.models.user import Principal
 from app.core.database import get_resources_collection
 
 router = APIRouter()
@@ -13,7 +13,7 @@ async def get_resources(
     category: Optional[str] = None,
     resource_type: Optional[str] = None,
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get mental health resources"""
     try:
@@ -45,7 +45,7 @@ async def get_resources(
 @router.get("/crisis")
 async def get_crisis_resources(
     country: str = Query("us"),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get crisis intervention resources"""
     try:
@@ -105,7 +105,7 @@ async def get_crisis_resources(
 @router.post("/save")
 async def save_resource(
     resource_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Save resource to user's collection"""
     try:
@@ -3,9 +3,10 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from loguru import logger
 from bson import ObjectId
-from app.core.database import get_users_collection, get_mood_logs_collection
+from app.core.database import get_users_collection, get_mood_logs_collection, get_mood_history_collection
 from app.models.user import User, UserUpdate, UserResponse
 from app.api.v1.endpoints.auth import get_current_user
+from app.mental_health.mood_history import mood_history_store
 # from app.models.mood import MoodLogCreate, MoodLogResponse
 from pydantic import BaseModel
 
@@ -168,6 +169,8 @@ async def update_password(
 async def export_user_data(current_user: User = Depends(get_current_user)):
     """Export user data"""
     try:
+        mood_history = await mood_history_store.recent(current_user.id)
+        
         # Create export data
         export_data = {
             "user_profile": {
@@ -179,7 +182,7 @@ async def export_user_data(current_user: User = Depends(get_current_user)):
             },
             "mental_health_data": {
                 "current_mood": current_user.current_mood,
-                "mood_history": current_user.mood_history,
+                "mood_history": mood_history,
                 "primary_concerns": current_user.primary_concerns,
                 "therapy_goals": current_user.therapy_goals,
                 "risk_level": current_user.risk_level,
@@ -213,6 +216,7 @@ async def delete_account(current_user: User = Depends(get_current_user)):
             # Try to delete from database
             users_collection = get_users_collection()
             await users_collection.delete_one({"_id": ObjectId(current_user.id)})
+            await get_mood_history_collection().delete_many({"user_id": current_user.id})
             
         except RuntimeError:
             # Database not available
@@ -0,0 +1,150 @@
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+from concurrent.futures import Executor
+from loguru import logger
+import asyncio
+import bisect
+import threading
+import time
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class Histogram:
+    """Fixed-bucket histogram; bucket i counts values <= bounds[i], the last counts the rest"""
+    
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.total += value
+            self.count += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+            return {
+                "count": self.count,
+                "mean": self.total / self.count if self.count else 0.0,
+                "buckets": dict(zip(labels, self.counts))
+            }
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100)
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesce concurrent single-item requests into batched calls.
+    
+    Callers await `submit(item)`. A background task collects items until
+    `max_batch_size` is reached or `max_wait_ms` has passed since the first
+    item of the batch arrived, runs `batch_fn` on the whole list in
+    `executor`, and resolves each caller's future with its own result.
+    """
+    
+    def __init__(
+        self,
+        batch_fn: Callable[[List[T]], Sequence[R]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        executor: Optional[Executor] = None,
+        name: str = "batcher"
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = Histogram(WAIT_MS_BUCKETS)
+    
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+    
+    async def submit(self, item: T) -> R:
+        """Queue one item and wait for its result"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+    
+    async def _collect(self) -> List[Tuple[T, asyncio.Future, float]]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            pending = [(item, future, queued_at) for item, future, queued_at in batch if not future.cancelled()]
+            if not pending:
+                continue
+            
+            self._observe(len(pending), [time.perf_counter() - queued_at for _, _, queued_at in pending])
+            
+            try:
+                results = await self._loop.run_in_executor(
+                    self.executor,
+                    self.batch_fn,
+                    [item for item, _, _ in pending]
+                )
+                if len(results) != len(pending):
+                    raise RuntimeError(f"{self.name} returned {len(results)} results for {len(pending)} items")
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(pending)} failed: {e}")
+                for _, future, _ in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future, _), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+    
+    def _observe(self, batch_size: int, waits: List[float]):
+        """Record batch size and how long each item queued before dispatch"""
+        self.batch_sizes.observe(batch_size)
+        for wait in waits:
+            self.wait_ms.observe(wait * 1000.0)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Batch-size and queue-wait histograms"""
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot()
+        }
+    
+    async def close(self):
+        """Stop the background worker"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
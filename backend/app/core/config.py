@@ -46,6 +46,68 @@ class Settings(BaseSettings):
     # AI Configuration
     GEMINI_API_KEY: str
     MODEL: str = Field(default="gemini-2.0-flash-exp")
+    LLM_PROVIDER: str = Field(default="gemini")  # gemini or stub (deterministic, offline)
+    LLM_STUB_LATENCY_DISTRIBUTION: str = Field(default="lognormal")  # fixed, uniform or lognormal
+    LLM_STUB_LATENCY_MS: float = Field(default=600.0)  # median time to first token
+    LLM_STUB_LATENCY_SIGMA: float = Field(default=0.4)  # lognormal sigma, or +/- fraction for uniform
+    LLM_STUB_TOKENS_PER_SECOND: float = Field(default=80.0)
+    LLM_STUB_SEED: int = Field(default=0)
+    CONVERSATION_ANALYSIS_LLM_ENRICHMENT: bool = Field(default=False)  # LLM adds to the local mood analysis
+    
+    # RAG engines built during startup; others load lazily on first use
+    RAG_WARMUP_ENGINES: List[str] = Field(default=["simple"])  # simple, rag
+    
+    @validator("RAG_WARMUP_ENGINES", pre=True)
+    def assemble_warmup_engines(cls, v):
+        if isinstance(v, str):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+    
+    # Knowledge base documents (defaults to the bundled JSON)
+    KNOWLEDGE_BASE_PATH: Optional[Path] = None
+    KNOWLEDGE_INGEST_ROOT: Path = Field(default=Path("knowledge"))  # directory the ingest API may read
+    INGEST_CHUNK_CHARS: int = Field(default=1500)
+    INGEST_CHUNK_OVERLAP: int = Field(default=150)  # only applied when a paragraph is cut mid-text
+    
+    @validator("INGEST_CHUNK_OVERLAP")
+    def check_chunk_overlap(cls, v, values):
+        if not 0 <= v < values.get("INGEST_CHUNK_CHARS", v + 1):
+            raise ValueError("INGEST_CHUNK_OVERLAP must be at least 0 and smaller than INGEST_CHUNK_CHARS")
+        return v
+    KNOWLEDGE_SNAPSHOT_DIR: Optional[Path] = None  # memory-mapped snapshots for the local vector backend
+    KNOWLEDGE_SNAPSHOT_RELOAD_INTERVAL_SECONDS: float = Field(default=30.0)
+    KNOWLEDGE_SNAPSHOT_KEEP: int = Field(default=3)  # published versions kept on disk
+    
+    # Embeddings
+    EMBEDDING_MODEL: str = Field(default="all-MiniLM-L6-v2")
+    EMBEDDING_BACKEND: str = Field(default="torch")  # torch (SentenceTransformer) or onnx (int8 ONNX Runtime)
+    EMBEDDING_ONNX_PATH: Path = Field(default=Path("models/all-MiniLM-L6-v2-onnx-int8"))
+    EMBEDDING_ONNX_THREADS: int = Field(default=0)  # 0 lets ONNX Runtime decide
+    EMBEDDING_MAX_TOKENS: int = Field(default=256)  # matches the model's max_seq_length
+    EMBEDDING_CACHE_SIZE: int = Field(default=10000)  # in-process LRU entries
+    EMBEDDING_CACHE_TTL_SECONDS: int = Field(default=30 * 24 * 3600)
+    EMBEDDING_COALESCE_MAX_BATCH: int = Field(default=32)  # concurrent query embeddings per encode call
+    EMBEDDING_COALESCE_MAX_WAIT_MS: float = Field(default=3.0)
+    EMBEDDING_BATCH_SIZE: int = Field(default=64)  # texts per encode forward pass
+    INGEST_BATCH_SIZE: int = Field(default=256)  # documents per embed/upsert step
+    INGEST_MAX_INFLIGHT_UPSERTS: int = Field(default=4)
+    
+    # Retrieval backend: pinecone or local (in-process cosine index)
+    VECTOR_BACKEND: str = Field(default="pinecone")
+    VECTOR_STORE_MAX_CONCURRENCY: int = Field(default=8)  # concurrent blocking store calls per worker
+    VECTOR_STORE_TIMEOUT_SECONDS: float = Field(default=5.0)
+    
+    # Retrieval mode for RAGEngine: vector or hybrid (BM25 + vector, fused with RRF)
+    RETRIEVAL_MODE: str = Field(default="hybrid")
+    HYBRID_CANDIDATES: int = Field(default=20)  # per-retriever candidates before fusion
+    HYBRID_RRF_K: int = Field(default=60)
+    RETRIEVAL_FILTER_BY_CONCERNS: bool = Field(default=True)  # restrict search to the user's concerns first
+    RETRIEVAL_FILTER_MIN_SCORE: float = Field(default=0.35)  # below this cosine score, fall back to unfiltered
+    RETRIEVAL_FILTER_MIN_LEXICAL_RATIO: float = Field(default=0.5)  # BM25: filtered best vs unfiltered best
+    
+    # Retrieval result cache (Redis), invalidated whenever the knowledge base changes
+    RETRIEVAL_CACHE_ENABLED: bool = Field(default=True)
+    RETRIEVAL_CACHE_TTL_SECONDS: int = Field(default=600)
     
     # Pinecone
     PINECONE_API_KEY: str
@@ -60,12 +122,31 @@ class Settings(BaseSettings):
     CRISIS_HOTLINE_NUMBER: str = Field(default="988")
     EMERGENCY_CONTACT_EMAIL: str = Field(default="emergency@healer-platform.com")
     
-    # Crisis Keywords
-    CRISIS_KEYWORDS: List[str] = Field(default=[
-        "suicide", "kill myself", "end my life", "not worth living",
-        "self harm", "cutting", "overdose", "want to die",
-        "hurt myself", "no point in living", "better off dead"
-    ])
+    # Crisis & Emotion Lexicon
+    LEXICON_SOURCE: str = Field(default="file")  # file or mongo
+    LEXICON_PATH: Optional[Path] = None  # defaults to the bundled lexicon
+    LEXICON_RELOAD_INTERVAL_SECONDS: float = Field(default=30.0)  # 0 disables hot reload
+    
+    # Long-message analysis
+    MOOD_CHUNKED_MIN_CHARS: int = Field(default=2000)
+    MOOD_CHUNK_WINDOW_CHARS: int = Field(default=400)
+    
+    # Emotion Classifier (optional second stage behind the lexicon)
+    EMOTION_CLASSIFIER_ENABLED: bool = Field(default=False)
+    EMOTION_CLASSIFIER_MODEL: str = Field(default="j-hartmann/emotion-english-distilroberta-base")
+    EMOTION_CLASSIFIER_BACKEND: str = Field(default="quantized")  # quantized or onnx
+    EMOTION_CLASSIFIER_ONNX_PATH: Path = Field(default=Path("models/emotion-english-distilroberta-onnx-int8"))
+    EMOTION_CLASSIFIER_MAX_TOKENS: int = Field(default=256)
+    EMOTION_CLASSIFIER_WEIGHT: float = Field(default=0.6)
+    EMOTION_AMBIGUITY_MARGIN: float = Field(default=0.15)
+    EMOTION_BATCH_MAX_SIZE: int = Field(default=16)
+    EMOTION_BATCH_MAX_WAIT_MS: float = Field(default=5.0)
+    
+    # Mood Logging
+    MOOD_BULK_MAX_ENTRIES: int = Field(default=366)  # entries per bulk sync request
+    MOOD_HISTORY_BUCKET_MAX_ENTRIES: int = Field(default=200)  # mood points per daily bucket document
+    MOOD_HISTORY_ANALYSIS_DAYS: int = Field(default=30)
+    MOOD_HISTORY_ANALYSIS_MAX_ENTRIES: int = Field(default=500)
     
     # Therapeutic Resources
     RESOURCE_CATEGORIES: List[str] = Field(default=[
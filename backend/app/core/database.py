@@ -3,6 +3,7 @@ from typing import Optional
 import redis.asyncio as redis
 from loguru import logger
 from app.core.config import settings
+from app.core.indexes import index_manager
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
@@ -31,7 +32,7 @@ async def connect_to_mongo():
         await db.database.command("ping")
         logger.info(f"Connected to MongoDB database: {settings.DATABASE_NAME}")
         
-        # Create indexes
+        # Build indexes in the background; readiness waits for them
         await create_indexes()
         
     except Exception as e:
@@ -40,6 +41,7 @@ async def connect_to_mongo():
 
 async def close_mongo_connection():
     """Close database connection"""
+    await index_manager.stop()
     if db.client:
         db.client.close()
         logger.info("Disconnected from MongoDB")
@@ -69,43 +71,8 @@ async def close_redis_connection():
         logger.info("Disconnected from Redis")
 
 async def create_indexes():
-    """Create database indexes for better performance"""
-    try:
-        # User indexes
-        users_collection = db.database["users"]
-        await users_collection.create_index("email", unique=True)
-        await users_collection.create_index("username", unique=True)
-        await users_collection.create_index("created_at")
-        await users_collection.create_index([("current_mood", 1), ("risk_level", 1)])
-        
-        # Conversation indexes
-        conversations_collection = db.database["conversations"]
-        await conversations_collection.create_index("user_id")
-        await conversations_collection.create_index("started_at")
-        await conversations_collection.create_index([("user_id", 1), ("status", 1)])
-        await conversations_collection.create_index([("crisis_detected", 1), ("risk_score", -1)])
-        
-        # Session indexes
-        sessions_collection = db.database["sessions"]
-        await sessions_collection.create_index("user_id")
-        await sessions_collection.create_index("token", unique=True)
-        await sessions_collection.create_index("expires_at")
-        
-        # Resources indexes
-        resources_collection = db.database["resources"]
-        await resources_collection.create_index("category")
-        await resources_collection.create_index([("category", 1), ("rating", -1)])
-        
-        # Exercises indexes
-        exercises_collection = db.database["exercises"]
-        await exercises_collection.create_index("type")
-        await exercises_collection.create_index("difficulty")
-        await exercises_collection.create_index([("type", 1), ("difficulty", 1)])
-        
-        logger.info("Database indexes created successfully")
-        
-    except Exception as e:
-        logger.error(f"Failed to create indexes: {e}")
+    """Build declared indexes in the background (see app/core/indexes.py)"""
+    index_manager.start(db.database)
 
 def get_database() -> AsyncIOMotorDatabase:
     """Get database instance"""
@@ -140,4 +107,16 @@ def get_exercises_collection():
 
 def get_mood_logs_collection():
     """Get mood logs collection"""
-    return get_database()["mood_logs"]
\ No newline at end of file
+    return get_database()["mood_logs"]
+
+def get_mood_history_collection():
+    """Get bucketed mood history collection"""
+    return get_database()["mood_history"]
+
+def get_lexicons_collection():
+    """Get lexicons collection"""
+    return get_database()["lexicons"]
+
+def get_knowledge_chunks_collection():
+    """Get knowledge chunks manifest collection"""
+    return get_database()["knowledge_chunks"]
\ No newline at end of file
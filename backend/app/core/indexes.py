@@ -0,0 +1,257 @@
+"""Declarative MongoDB index specs, background builds and hot-path verification.
+
+`INDEX_SPECS` is the single source of truth for indexes. At startup the
+IndexManager diffs each collection's existing indexes against its spec,
+builds missing ones for all collections concurrently in the background, and
+then explains every query in `HOT_PATH_QUERIES`. The app reports ready only
+once no hot-path query plans as a collection scan.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+import asyncio
+
+@dataclass(frozen=True)
+class IndexSpec:
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    # Only documents matching this expression are indexed (and held unique)
+    partial_filter: Optional[Dict[str, Any]] = None
+    
+    @property
+    def name(self) -> str:
+        # Same naming as pymongo's default, so indexes created before specs existed match
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+    
+    def model(self) -> IndexModel:
+        options: Dict[str, Any] = {}
+        if self.partial_filter is not None:
+            options["partialFilterExpression"] = self.partial_filter
+        return IndexModel(list(self.keys), name=self.name, unique=self.unique, background=True, **options)
+    
+    def matches(self, existing: Dict[str, Any]) -> bool:
+        return tuple((key, int(direction)) for key, direction in existing["key"]) == self.keys \
+            and bool(existing.get("unique", False)) == self.unique \
+            and existing.get("partialFilterExpression") == self.partial_filter
+
+def index(*keys: Any, unique: bool = False, partial_filter: Optional[Dict[str, Any]] = None) -> IndexSpec:
+    """Build a spec from field names or (field, direction) pairs"""
+    return IndexSpec(
+        keys=tuple(key if isinstance(key, tuple) else (key, ASCENDING) for key in keys),
+        unique=unique,
+        partial_filter=partial_filter
+    )
+
+INDEX_SPECS: Dict[str, List[IndexSpec]] = {
+    "users": [
+        index("email", unique=True),
+        index("username", unique=True),
+        index("id"),
+        index("created_at"),
+        index("current_mood", "risk_level"),
+    ],
+    "conversations": [
+        index("id"),
+        index("user_id"),
+        index(("user_id", ASCENDING), ("started_at", DESCENDING)),
+        index("started_at"),
+        index("user_id", "status"),
+        index(("crisis_detected", ASCENDING), ("risk_score", DESCENDING)),
+    ],
+    "mood_logs": [
+        # One mood entry per user per day; per-day upserts rely on it under concurrency.
+        # Partial, because daily check-ins share the collection without a `date`.
+        # Duplicate (user_id, date) mood entries must be removed before it can build.
+        index("user_id", "date", unique=True, partial_filter={"date": {"$exists": True}}),
+        index(("user_id", ASCENDING), ("timestamp", DESCENDING)),
+        # One daily check-in per user per day, for the check-in upsert
+        index("user_id", "checkin_date", unique=True, partial_filter={"checkin_date": {"$exists": True}}),
+    ],
+    "mood_history": [
+        index(("user_id", ASCENDING), ("day", DESCENDING)),
+    ],
+    "sessions": [
+        index("user_id"),
+        index("token", unique=True),
+        index("expires_at"),
+    ],
+    "resources": [
+        index("category"),
+        index(("category", ASCENDING), ("rating", DESCENDING)),
+    ],
+    "exercises": [
+        index("type"),
+        index("difficulty"),
+        index("type", "difficulty"),
+    ],
+    "lexicons": [
+        index(("active", ASCENDING), ("published_at", DESCENDING)),
+    ],
+}
+
+@dataclass(frozen=True)
+class HotPathQuery:
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+
+_SAMPLE_DAY = "2024-01-01"
+_SAMPLE_TIME = datetime(2024, 1, 1)
+
+# Shapes of the queries request handlers run on every call. A partial index
+# only serves queries whose filter implies its expression; an equality or
+# range on a field implies it exists, so the mood_logs probes still use them.
+HOT_PATH_QUERIES: List[HotPathQuery] = [
+    HotPathQuery("mood log by date", "mood_logs", {"user_id": "u", "date": _SAMPLE_DAY}),
+    HotPathQuery("mood entries by range", "mood_logs",
+                 {"user_id": "u", "date": {"$gte": _SAMPLE_DAY, "$lte": _SAMPLE_DAY}}, [("date", ASCENDING)]),
+    HotPathQuery("mood history", "mood_logs",
+                 {"user_id": "u", "timestamp": {"$gte": _SAMPLE_TIME}}, [("timestamp", DESCENDING)]),
+    HotPathQuery("check-in by day", "mood_logs",
+                 {"user_id": "u", "type": "daily_check_in", "checkin_date": _SAMPLE_DAY}),
+    HotPathQuery("mood history range", "mood_history",
+                 {"user_id": "u", "day": {"$gte": _SAMPLE_TIME}}, [("day", DESCENDING)]),
+    HotPathQuery("mood history bucket", "mood_history",
+                 {"user_id": "u", "day": _SAMPLE_TIME, "count": {"$lt": 1}}),
+    HotPathQuery("conversation by id", "conversations", {"id": "c", "user_id": "u"}),
+    HotPathQuery("conversation update", "conversations", {"id": "c"}),
+    HotPathQuery("conversation list", "conversations", {"user_id": "u"}, [("started_at", DESCENDING)]),
+    HotPathQuery("user by id", "users", {"id": "u"}),
+    HotPathQuery("user by username", "users", {"username": "u"}),
+]
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Every stage name in an explain plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+async def diff_indexes(database: AsyncIOMotorDatabase, collection: str, specs: List[IndexSpec]) -> Dict[str, List[str]]:
+    """Compare a collection's indexes with its spec"""
+    existing = await database[collection].index_information()
+    declared = {spec.name: spec for spec in specs}
+    return {
+        "missing": [name for name in declared if name not in existing],
+        "mismatched": [name for name, spec in declared.items() if name in existing and not spec.matches(existing[name])],
+        "undeclared": [name for name in existing if name != "_id_" and name not in declared]
+    }
+
+async def sync_collection(database: AsyncIOMotorDatabase, collection: str, specs: List[IndexSpec]) -> Dict[str, Any]:
+    """Build the indexes a collection is missing; mismatches are reported, never dropped"""
+    diff = await diff_indexes(database, collection, specs)
+    if diff["missing"]:
+        try:
+            await database[collection].create_indexes([spec.model() for spec in specs if spec.name in diff["missing"]])
+        except DuplicateKeyError as e:
+            logger.error(f"Unique index build on {collection} blocked by duplicate documents; remove them and restart: {e}")
+            raise
+        logger.info(f"Built indexes on {collection}: {', '.join(diff['missing'])}")
+    if diff["mismatched"]:
+        logger.warning(f"Indexes on {collection} differ from spec (drop and rebuild manually): {', '.join(diff['mismatched'])}")
+    if diff["undeclared"]:
+        logger.info(f"Undeclared indexes on {collection}: {', '.join(diff['undeclared'])}")
+    return diff
+
+async def explain_hot_path(database: AsyncIOMotorDatabase, query: HotPathQuery) -> Dict[str, Any]:
+    """Winning plan summary for a hot-path query"""
+    command: Dict[str, Any] = {"find": query.collection, "filter": query.filter}
+    if query.sort:
+        command["sort"] = dict(query.sort)
+    explanation = await database.command("explain", command, verbosity="queryPlanner")
+    stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+    return {
+        "query": query.name,
+        "collection": query.collection,
+        "stages": stages,
+        "collection_scan": "COLLSCAN" in stages
+    }
+
+class IndexManager:
+    """Runs index sync in the background and tracks readiness"""
+    
+    def __init__(self, specs: Dict[str, List[IndexSpec]] = INDEX_SPECS, hot_paths: List[HotPathQuery] = HOT_PATH_QUERIES):
+        self.specs = specs
+        self.hot_paths = hot_paths
+        self.state = "pending"
+        self.report: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+    
+    def start(self, database: AsyncIOMotorDatabase):
+        """Begin syncing indexes without blocking startup"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self.sync(database))
+    
+    async def stop(self):
+        """Cancel an unfinished sync"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+    
+    async def sync(self, database: AsyncIOMotorDatabase) -> bool:
+        """Build missing indexes for every collection concurrently, then verify hot paths"""
+        self.state = "building"
+        started = asyncio.get_running_loop().time()
+        
+        collections = list(self.specs)
+        results = await asyncio.gather(
+            *[sync_collection(database, collection, self.specs[collection]) for collection in collections],
+            return_exceptions=True
+        )
+        indexes = {}
+        for collection, result in zip(collections, results):
+            if isinstance(result, Exception):
+                logger.error(f"Index build failed on {collection}: {result}")
+                indexes[collection] = {"error": str(result)}
+            else:
+                indexes[collection] = result
+        
+        try:
+            plans = await asyncio.gather(*[explain_hot_path(database, query) for query in self.hot_paths])
+        except Exception as e:
+            logger.error(f"Hot-path verification failed: {e}")
+            plans = []
+            self.state = "failed"
+        
+        scans = [plan["query"] for plan in plans if plan["collection_scan"]]
+        if self.state != "failed":
+            self.state = "failed" if scans else "ready"
+        
+        self.report = {
+            "indexes": indexes,
+            "hot_paths": plans,
+            "collection_scans": scans,
+            "seconds": asyncio.get_running_loop().time() - started
+        }
+        
+        if scans:
+            logger.error(f"Hot-path queries would scan collections: {', '.join(scans)}")
+        else:
+            logger.info(f"Database indexes {self.state} in {self.report['seconds']:.2f}s")
+        return self.ready
+    
+    def status(self) -> Dict[str, Any]:
+        return {"state": self.state, **self.report}
+
+# Singleton manager
+index_manager = IndexManager()
@@ -2,16 +2,23 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
 from contextlib import asynccontextmanager
 from loguru import logger
 import sys
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection, connect_to_redis, close_redis_connection
+from app.core.indexes import index_manager
 from app.api.v1.api import api_router
 from app.core.security import rate_limiter
+from app.mental_health.lexicon import lexicon_registry
+from app.mental_health.emotion_classifier import emotion_classifier_service
+from app.rag.simple_rag import warmup_simple_rag_engine
+from app.rag.rag_engine import warmup_rag_engine, sync_rag_lexical_index, snapshot_watcher
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+import asyncio
 import time
 
 # Configure logging
@@ -28,12 +35,29 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     
-    # Connect to databases
-    await connect_to_mongo()
-    await connect_to_redis()
+    # Connect to databases while the configured RAG engines load
+    warmups = {
+        "simple": warmup_simple_rag_engine,
+        "rag": warmup_rag_engine
+    }
+    await asyncio.gather(
+        connect_to_mongo(),
+        connect_to_redis(),
+        *[warmups[name]() for name in settings.RAG_WARMUP_ENGINES if name in warmups]
+    )
+    
+    # Pick up the configured lexicon and keep it hot-reloadable
+    await lexicon_registry.refresh()
+    lexicon_registry.start_watching()
+    logger.info(f"Lexicon version {lexicon_registry.current.version} active")
+    
+    logger.info(f"RAG engines warmed: {', '.join(settings.RAG_WARMUP_ENGINES) or 'none'}")
+    
+    # Chunks ingested elsewhere are in the shared vector store; add them to this worker's BM25 index
+    await sync_rag_lexical_index()
     
-    # Knowledge base ready (using simple RAG)
-    logger.info("Simple RAG engine ready")
+    # Swap to knowledge snapshots published by ingestion without a restart
+    snapshot_watcher.start_watching()
     
     logger.info("Application startup complete")
     
@@ -42,6 +66,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down application")
     
+    await lexicon_registry.stop_watching()
+    await snapshot_watcher.stop_watching()
+    await emotion_classifier_service.close()
+    
     # Close database connections
     await close_mongo_connection()
     await close_redis_connection()
@@ -123,85 +151,32 @@ async def health_check():
         "version": settings.APP_VERSION
     }
 
+# Readiness check endpoint
+@app.get("/ready")
+async def readiness_check():
+    """Ready once declared indexes are built and no hot-path query scans a collection"""
+    indexes = index_manager.status()
+    return JSONResponse(
+        status_code=200 if index_manager.ready else 503,
+        content={
+            "status": "ready" if index_manager.ready else "not_ready",
+            "indexes": jsonable_encoder(indexes)
+        }
+    )
+
 # Initialize knowledge base
 async def initialize_knowledge_base():
     """Initialize mental health knowledge base"""
     try:
-        from app.rag.rag_engine import rag_engine
+        from app.rag.rag_engine import get_rag_engine
+        from app.rag.lexical_index import load_knowledge_documents
+        rag_engine = get_rag_engine()
+        
+        # Drop cached vectors from a previous embedding model
+        await rag_engine.embedding_cache.check_model()
         
-        # Sample mental health knowledge documents
-        knowledge_docs = [
-            {
-                "id": "coping_anxiety_1",
-                "content": "Deep breathing exercises can help manage anxiety. Try the 4-7-8 technique: Inhale for 4 counts, hold for 7 counts, exhale for 8 counts. This activates the parasympathetic nervous system and promotes relaxation.",
-                "category": "anxiety",
-                "type": "coping_strategy",
-                "tags": ["breathing", "anxiety", "relaxation"]
-            },
-            {
-                "id": "coping_depression_1",
-                "content": "Behavioral activation is effective for depression. Start small: schedule one pleasant activity daily, even if you don't feel like it. Gradual engagement in activities can improve mood over time.",
-                "category": "depression",
-                "type": "coping_strategy",
-                "tags": ["depression", "behavioral_activation", "activities"]
-            },
-            {
-                "id": "mindfulness_1",
-                "content": "Mindfulness meditation reduces stress and improves emotional regulation. Practice: Sit comfortably, focus on your breath, observe thoughts without judgment, gently return focus to breathing when mind wanders.",
-                "category": "mindfulness",
-                "type": "exercise",
-                "tags": ["mindfulness", "meditation", "stress"]
-            },
-            {
-                "id": "cbt_thought_1",
-                "content": "Cognitive restructuring helps challenge negative thoughts. Ask yourself: Is this thought based on facts or feelings? What evidence supports or contradicts it? What would I tell a friend in this situation?",
-                "category": "cbt",
-                "type": "technique",
-                "tags": ["cbt", "thoughts", "cognitive"]
-            },
-            {
-                "id": "grounding_1",
-                "content": "The 5-4-3-2-1 grounding technique helps with panic and dissociation. Identify: 5 things you see, 4 things you can touch, 3 things you hear, 2 things you smell, 1 thing you taste.",
-                "category": "grounding",
-                "type": "technique",
-                "tags": ["grounding", "panic", "anxiety"]
-            },
-            {
-                "id": "sleep_hygiene_1",
-                "content": "Good sleep hygiene improves mental health. Maintain consistent sleep schedule, avoid screens 1 hour before bed, keep bedroom cool and dark, limit caffeine after 2pm, create relaxing bedtime routine.",
-                "category": "sleep",
-                "type": "guidance",
-                "tags": ["sleep", "hygiene", "wellness"]
-            },
-            {
-                "id": "crisis_support_1",
-                "content": "If you're in crisis, reach out immediately: Call 988 (Suicide & Crisis Lifeline), Text HOME to 741741 (Crisis Text Line), or call 911 for immediate danger. You don't have to face this alone.",
-                "category": "crisis",
-                "type": "resource",
-                "tags": ["crisis", "emergency", "support"]
-            },
-            {
-                "id": "self_compassion_1",
-                "content": "Practice self-compassion during difficult times. Treat yourself with the same kindness you'd show a friend. Remember: suffering is part of human experience, you deserve understanding and care.",
-                "category": "self_compassion",
-                "type": "concept",
-                "tags": ["self_compassion", "kindness", "acceptance"]
-            },
-            {
-                "id": "emotion_regulation_1",
-                "content": "TIPP technique for intense emotions: Temperature (cold water on face), Intense exercise (jumping jacks), Paced breathing (exhale longer than inhale), Paired muscle relaxation (tense and release).",
-                "category": "emotion_regulation",
-                "type": "technique",
-                "tags": ["emotions", "regulation", "dbt"]
-            },
-            {
-                "id": "social_connection_1",
-                "content": "Social connection is vital for mental health. Even small interactions help. Try: sending a text to a friend, joining online communities, volunteering, attending support groups, or scheduling regular check-ins.",
-                "category": "social",
-                "type": "guidance",
-                "tags": ["social", "connection", "support"]
-            }
-        ]
+        # Mental health knowledge documents
+        knowledge_docs = load_knowledge_documents()
         
         # Store knowledge in vector database
         await rag_engine.store_knowledge(knowledge_docs)
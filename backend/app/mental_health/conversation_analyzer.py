@@ -0,0 +1,163 @@
+from typing import Dict, List, Any, Optional, Sequence, Union
+from loguru import logger
+from app.mental_health.mood_detector import MoodDetector, mood_detector
+import numpy as np
+
+CRISIS_WEIGHTS = {
+    'critical': 1.0,
+    'high': 0.8,
+    'medium': 0.5,
+    'low': 0.2,
+    'none': 0.0
+}
+
+EMOTION_INTERVENTIONS = {
+    'anxiety': ["4-7-8 breathing", "5-4-3-2-1 grounding"],
+    'fear': ["5-4-3-2-1 grounding", "4-7-8 breathing"],
+    'depression': ["behavioral activation: schedule one pleasant activity", "self-compassion practice"],
+    'sadness': ["self-compassion practice", "reach out to a friend"],
+    'anger': ["TIPP skill for intense emotions", "paced breathing"],
+    'disgust': ["cognitive restructuring of self-critical thoughts"],
+}
+
+# Total sentiment change over the conversation that counts as a real trend
+TREND_THRESHOLD = 0.2
+# Recency weighting: the latest message weighs 1, each earlier one RECENCY_DECAY times less
+RECENCY_DECAY = 0.85
+CRISIS_RECENCY_FLOOR = 0.7
+
+class ConversationAnalyzer:
+    """Local conversation mood analysis from per-message scores.
+    
+    Works on the sentiment, emotion and crisis scores MoodDetector stores on
+    each user message (messages without stored scores are scored on the
+    fly), so a conversation is analysed in one vectorised pass rather than
+    an LLM round trip. Output keys match what the LLM analysis returned.
+    """
+    
+    def __init__(self, detector: Optional[MoodDetector] = None):
+        self.detector = detector or mood_detector
+    
+    def _scores(self, message: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Stored scores for a message, or freshly computed ones"""
+        if isinstance(message, dict) and message.get('sentiment_score') is not None:
+            return {
+                'sentiment': message['sentiment_score'],
+                'emotions': message.get('emotion_scores') or {},
+                'crisis_level': message.get('crisis_level') or ('medium' if message.get('contains_crisis_language') else 'none')
+            }
+        
+        text = message.get('content', '') if isinstance(message, dict) else message
+        analysis = self.detector.detect_mood(text)
+        return {
+            'sentiment': analysis['sentiment_scores']['compound'],
+            'emotions': analysis.get('emotions') or {},
+            'crisis_level': analysis.get('crisis_level', 'none')
+        }
+    
+    def analyze(self, messages: Sequence[Union[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Trajectory, dominant emotions, 0-10 risk score and suggested interventions"""
+        user_messages = [
+            message for message in messages
+            if not isinstance(message, dict) or message.get('role', 'user') == 'user'
+        ]
+        if not user_messages:
+            return {
+                "mood_trajectory": "unknown",
+                "dominant_emotions": [],
+                "risk_score": 0,
+                "progress_indicators": [],
+                "recommended_interventions": [],
+                "messages_analyzed": 0,
+                "source": "local"
+            }
+        
+        scores = [self._scores(message) for message in user_messages]
+        count = len(scores)
+        
+        sentiment = np.fromiter((s['sentiment'] for s in scores), dtype=np.float64, count=count)
+        crisis = np.fromiter((CRISIS_WEIGHTS.get(s['crisis_level'], 0.0) for s in scores), dtype=np.float64, count=count)
+        categories = sorted({category for s in scores for category in s['emotions']})
+        emotions = np.array(
+            [[s['emotions'].get(category, 0.0) for category in categories] for s in scores],
+            dtype=np.float64
+        ).reshape(count, len(categories))
+        recency = RECENCY_DECAY ** np.arange(count - 1, -1, -1, dtype=np.float64)
+        
+        # Trajectory: least-squares slope of sentiment over message index, as total change
+        if count >= 2:
+            positions = np.arange(count, dtype=np.float64) - (count - 1) / 2.0
+            slope = float(positions @ (sentiment - sentiment.mean()) / (positions @ positions))
+            change = slope * (count - 1)
+        else:
+            slope = change = 0.0
+        
+        if count < 2:
+            trajectory = "insufficient_data"
+        elif change > TREND_THRESHOLD:
+            trajectory = "improving"
+        elif change < -TREND_THRESHOLD:
+            trajectory = "declining"
+        else:
+            trajectory = "stable"
+        
+        # Dominant emotions: recency-weighted emotion mass
+        weighted = recency @ emotions if categories else np.zeros(0)
+        order = np.argsort(-weighted)
+        dominant = [categories[i] for i in order[:3] if weighted[i] > 0]
+        
+        # Risk 0-10: worst recent crisis signal, recent negativity and decline
+        recent_weights = recency / recency.sum()
+        recent_negativity = float(recent_weights @ np.clip(-sentiment, 0.0, 1.0))
+        # Crisis language fades slowly: it never drops below CRISIS_RECENCY_FLOOR of its weight
+        peak_crisis = float((crisis * np.maximum(recency, CRISIS_RECENCY_FLOOR)).max())
+        decline = min(max(-change, 0.0), 1.0)
+        risk = 10.0 * min(1.0, 0.6 * peak_crisis + 0.3 * recent_negativity + 0.1 * decline)
+        
+        return {
+            "mood_trajectory": trajectory,
+            "dominant_emotions": dominant,
+            "risk_score": round(risk, 1),
+            "progress_indicators": self._progress_indicators(sentiment, crisis, change),
+            "recommended_interventions": self._interventions(dominant, risk),
+            "sentiment_slope": float(slope),
+            "messages_analyzed": count,
+            "source": "local"
+        }
+    
+    @staticmethod
+    def _progress_indicators(sentiment: np.ndarray, crisis: np.ndarray, change: float) -> List[str]:
+        indicators = []
+        if len(sentiment) >= 2 and abs(change) > TREND_THRESHOLD:
+            direction = "improved" if change > 0 else "declined"
+            indicators.append(f"Sentiment {direction} by {abs(change):.2f} over the conversation")
+        
+        half = len(sentiment) // 2
+        if half:
+            early, late = sentiment[:half], sentiment[half:]
+            early_negative, late_negative = float((early < -0.05).mean()), float((late < -0.05).mean())
+            if late_negative < early_negative:
+                indicators.append("Fewer negative messages in the second half")
+            elif late_negative > early_negative:
+                indicators.append("More negative messages in the second half")
+            
+            if crisis[:half].max() > 0 and crisis[half:].max() == 0:
+                indicators.append("No crisis language in recent messages")
+        
+        return indicators
+    
+    @staticmethod
+    def _interventions(dominant: List[str], risk: float) -> List[str]:
+        interventions = []
+        if risk >= 7:
+            interventions.append("Share crisis resources (988, text HOME to 741741)")
+        for emotion in dominant:
+            for intervention in EMOTION_INTERVENTIONS.get(emotion, []):
+                if intervention not in interventions:
+                    interventions.append(intervention)
+        if risk >= 4:
+            interventions.append("Encourage contact with a mental health professional")
+        return interventions[:5]
+
+# Singleton instance
+conversation_analyzer = ConversationAnalyzer()
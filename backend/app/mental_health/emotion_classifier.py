@@ -0,0 +1,214 @@
+from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from loguru import logger
+from app.core.config import settings
+from app.core.batching import MicroBatcher
+from app.rag.embedders import QUANTIZED_MODEL_FILE
+import numpy as np
+import threading
+import json
+
+# Model labels mapped onto MoodDetector emotion categories
+LABEL_TO_CATEGORY = {
+    'anger': 'anger',
+    'annoyance': 'anger',
+    'disgust': 'disgust',
+    'fear': 'fear',
+    'nervousness': 'anxiety',
+    'joy': 'joy',
+    'sadness': 'sadness',
+    'grief': 'depression',
+    'surprise': 'surprise',
+}
+
+class EmotionClassifier:
+    """Local CPU transformer emotion classifier.
+    
+    The model is loaded lazily on first use, either as an int8 dynamically
+    quantized PyTorch model or as a pre-exported int8 ONNX model run on ONNX
+    Runtime with numpy inputs (no torch in the worker), and scores texts in
+    batches.
+    """
+    
+    def __init__(self, model_name: Optional[str] = None, backend: Optional[str] = None):
+        self.model_name = model_name or settings.EMOTION_CLASSIFIER_MODEL
+        self.backend = backend or settings.EMOTION_CLASSIFIER_BACKEND
+        self.max_length = settings.EMOTION_CLASSIFIER_MAX_TOKENS
+        self._tokenizer = None
+        self._model = None
+        self._session = None
+        self._input_names = set()
+        self._labels: List[str] = []
+        self._lock = threading.Lock()
+    
+    def _load_onnx(self, model_dir: Path):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            str(model_dir / QUANTIZED_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+        
+        tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=self.max_length)
+        # RoBERTa-style models pad with "<pad>" (id 1), BERT-style with "[PAD]" (id 0)
+        pad_token = "<pad>" if tokenizer.token_to_id("<pad>") is not None else "[PAD]"
+        tokenizer.enable_padding(pad_id=tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token)
+        self._tokenizer = tokenizer
+        
+        with open(model_dir / "config.json", "r", encoding="utf-8") as f:
+            id2label = json.load(f)["id2label"]
+        self._labels = [id2label[str(i)].lower() for i in range(len(id2label))]
+    
+    def _load(self):
+        with self._lock:
+            if self._model is not None or self._session is not None:
+                return
+            
+            if self.backend == "onnx":
+                self._load_onnx(Path(settings.EMOTION_CLASSIFIER_ONNX_PATH))
+            else:
+                import torch
+                from transformers import AutoTokenizer, AutoModelForSequenceClassification
+                
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+                model.eval()
+                self._model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                
+                id2label = self._model.config.id2label
+                self._labels = [id2label[i].lower() for i in range(len(id2label))]
+            
+            logger.info(f"Loaded emotion classifier {self.model_name} ({self.backend})")
+    
+    def _logits(self, texts: List[str]) -> np.ndarray:
+        if self._session is not None:
+            encodings = self._tokenizer.encode_batch(texts)
+            input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+            feeds = {
+                "input_ids": input_ids,
+                "attention_mask": np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+            }
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            return self._session.run(None, feeds)[0]
+        
+        import torch
+        inputs = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="pt"
+        )
+        with torch.inference_mode():
+            return self._model(**inputs).logits.numpy()
+    
+    def classify_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Score a batch of texts, returning emotion category probabilities per text"""
+        self._load()
+        
+        logits = self._logits(texts)
+        exponentials = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        probabilities = (exponentials / exponentials.sum(axis=-1, keepdims=True)).tolist()
+        
+        results = []
+        for row in probabilities:
+            scores: Dict[str, float] = {}
+            for label, probability in zip(self._labels, row):
+                category = LABEL_TO_CATEGORY.get(label)
+                if category:
+                    scores[category] = scores.get(category, 0.0) + probability
+            results.append(scores)
+        
+        return results
+
+class EmotionClassifierService:
+    """Gated, micro-batched access to the emotion classifier.
+    
+    Only messages the lexicon pass finds ambiguous or risky are sent to the
+    model; concurrent requests are coalesced into one forward pass.
+    """
+    
+    def __init__(self):
+        self.enabled = settings.EMOTION_CLASSIFIER_ENABLED
+        self.classifier = EmotionClassifier()
+        # One inference thread; batching, not parallelism, provides throughput
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotion-clf")
+        self.batcher = MicroBatcher(
+            self.classifier.classify_batch,
+            max_batch_size=settings.EMOTION_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMOTION_BATCH_MAX_WAIT_MS,
+            executor=self.executor,
+            name="emotion classifier"
+        )
+    
+    def should_classify(self, mood_analysis: Dict[str, Any]) -> bool:
+        """Whether the lexicon result is ambiguous or risky enough to need the model"""
+        if not self.enabled:
+            return False
+        
+        if mood_analysis.get('crisis_level') not in (None, 'none'):
+            return True
+        
+        emotions = mood_analysis.get('emotions') or {}
+        if not emotions:
+            # No lexicon hit, but VADER still sees strong feeling
+            return abs(mood_analysis.get('sentiment_scores', {}).get('compound', 0.0)) >= 0.3
+        
+        ranked = sorted(emotions.values(), reverse=True)
+        if len(ranked) > 1 and ranked[0] - ranked[1] < settings.EMOTION_AMBIGUITY_MARGIN:
+            return True
+        
+        return mood_analysis.get('confidence', 1.0) < 0.3
+    
+    async def classify(self, text: str) -> Optional[Dict[str, float]]:
+        """Model emotion scores for text, or None if the model is unavailable"""
+        try:
+            return await self.batcher.submit(text)
+        except Exception as e:
+            logger.error(f"Emotion classification error: {e}")
+            return None
+    
+    async def close(self):
+        await self.batcher.close()
+        self.executor.shutdown(wait=False)
+
+def export_onnx_classifier(model_name: str, output_dir: Path):
+    """Export model_name to ONNX and quantize it to int8 (dynamic, per-channel)"""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    
+    output_dir = Path(output_dir)
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    
+    quantizer = ORTQuantizer.from_pretrained(output_dir)
+    quantizer.quantize(
+        save_dir=output_dir,
+        quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=True)
+    )
+    logger.info(f"Exported int8 ONNX emotion classifier for {model_name} to {output_dir}")
+
+# Singleton instance
+emotion_classifier_service = EmotionClassifierService()
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Emotion classifier tools")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export = subcommands.add_parser("export", help="export and quantize the emotion classifier to ONNX")
+    export.add_argument("--model", default=settings.EMOTION_CLASSIFIER_MODEL)
+    export.add_argument("--output", type=Path, default=settings.EMOTION_CLASSIFIER_ONNX_PATH)
+    args = parser.parse_args()
+    
+    export_onnx_classifier(args.model, args.output)
@@ -0,0 +1,185 @@
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+from loguru import logger
+from app.core.config import settings
+import asyncio
+import json
+import os
+import re
+
+DEFAULT_LEXICON_PATH = Path(__file__).parent / "data" / "lexicon.json"
+
+CRISIS_TIERS = ('high_risk', 'medium_risk', 'warning_signs')
+
+def _compile_group(keywords: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """Compile a keyword group into a single alternation used as a pre-filter"""
+    if not keywords:
+        return None
+    # Longest first so the alternation never stops on a shorter prefix
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile("|".join(re.escape(keyword) for keyword in ordered))
+
+@dataclass(frozen=True)
+class CompiledLexicon:
+    """Immutable, pre-compiled keyword lexicon.
+    
+    Each keyword group carries a combined regex that rejects texts containing
+    none of its keywords in one pass. Matching semantics stay plain substring
+    containment, so results are identical to scanning the lists directly.
+    """
+    version: str
+    crisis_keywords: Dict[str, Tuple[str, ...]]
+    positive_keywords: Tuple[str, ...]
+    emotion_categories: Dict[str, Tuple[str, ...]]
+    crisis_patterns: Dict[str, Optional[re.Pattern]]
+    positive_pattern: Optional[re.Pattern]
+    emotion_patterns: Dict[str, Optional[re.Pattern]]
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompiledLexicon":
+        """Validate and compile a raw lexicon document"""
+        version = str(data.get('version') or '').strip()
+        if not version:
+            raise ValueError("Lexicon is missing a version")
+        
+        raw_crisis = data.get('crisis_keywords') or {}
+        missing = [tier for tier in CRISIS_TIERS if tier not in raw_crisis]
+        if missing:
+            raise ValueError(f"Lexicon {version} is missing crisis tiers: {missing}")
+        
+        crisis_keywords = {
+            tier: tuple(keyword.lower().strip() for keyword in raw_crisis[tier] if keyword.strip())
+            for tier in CRISIS_TIERS
+        }
+        positive_keywords = tuple(
+            keyword.lower().strip() for keyword in data.get('positive_keywords', []) if keyword.strip()
+        )
+        emotion_categories = {
+            emotion: tuple(keyword.lower().strip() for keyword in keywords if keyword.strip())
+            for emotion, keywords in (data.get('emotion_categories') or {}).items()
+        }
+        
+        return cls(
+            version=version,
+            crisis_keywords=crisis_keywords,
+            positive_keywords=positive_keywords,
+            emotion_categories=emotion_categories,
+            crisis_patterns={tier: _compile_group(kws) for tier, kws in crisis_keywords.items()},
+            positive_pattern=_compile_group(positive_keywords),
+            emotion_patterns={emotion: _compile_group(kws) for emotion, kws in emotion_categories.items()}
+        )
+    
+    def all_crisis_terms(self) -> List[str]:
+        """Flattened crisis terms across all tiers"""
+        return [keyword for tier in CRISIS_TIERS for keyword in self.crisis_keywords[tier]]
+
+def load_lexicon_file(path: Optional[Path] = None) -> CompiledLexicon:
+    """Load and compile a lexicon from a JSON file"""
+    path = Path(path or settings.LEXICON_PATH or DEFAULT_LEXICON_PATH)
+    with open(path, "r", encoding="utf-8") as f:
+        return CompiledLexicon.from_dict(json.load(f))
+
+class LexiconRegistry:
+    """Holds the active lexicon for this worker.
+    
+    Readers take a single reference to `current` and use it for the whole
+    analysis, so a concurrent swap never mixes two versions in one result.
+    Rebuilding happens off the request path; the swap itself is one
+    attribute assignment.
+    """
+    
+    def __init__(self, lexicon: CompiledLexicon):
+        self._current = lexicon
+        self._file_mtime: Optional[float] = None
+        self._watch_task: Optional[asyncio.Task] = None
+    
+    @property
+    def current(self) -> CompiledLexicon:
+        return self._current
+    
+    def swap(self, lexicon: CompiledLexicon) -> bool:
+        """Atomically replace the active lexicon, returns True if the version changed"""
+        if lexicon.version == self._current.version:
+            return False
+        previous = self._current.version
+        self._current = lexicon
+        logger.info(f"Lexicon swapped: {previous} -> {lexicon.version}")
+        return True
+    
+    async def _load_from_mongo(self) -> Optional[CompiledLexicon]:
+        """Load the newest lexicon document from MongoDB"""
+        from app.core.database import get_lexicons_collection
+        
+        document = await get_lexicons_collection().find_one(
+            {"active": True},
+            sort=[("published_at", -1)]
+        )
+        if document is None:
+            return None
+        document.pop("_id", None)
+        current = self._current
+        if str(document.get("version")) == current.version:
+            return None
+        return await asyncio.to_thread(CompiledLexicon.from_dict, document)
+    
+    async def _load_from_file(self) -> Optional[CompiledLexicon]:
+        """Reload the lexicon file if it changed on disk"""
+        path = Path(settings.LEXICON_PATH or DEFAULT_LEXICON_PATH)
+        mtime = os.stat(path).st_mtime
+        if mtime == self._file_mtime:
+            return None
+        lexicon = await asyncio.to_thread(load_lexicon_file, path)
+        self._file_mtime = mtime
+        return lexicon
+    
+    async def refresh(self) -> bool:
+        """Check the configured source once and swap if a new version exists"""
+        try:
+            if settings.LEXICON_SOURCE == "mongo":
+                lexicon = await self._load_from_mongo()
+            else:
+                lexicon = await self._load_from_file()
+        except Exception as e:
+            # Keep serving the last good lexicon
+            logger.error(f"Lexicon refresh failed: {e}")
+            return False
+        
+        if lexicon is None:
+            return False
+        return self.swap(lexicon)
+    
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh()
+    
+    def start_watching(self):
+        """Start polling the lexicon source in the background"""
+        interval = settings.LEXICON_RELOAD_INTERVAL_SECONDS
+        if interval <= 0 or self._watch_task is not None:
+            return
+        self._watch_task = asyncio.create_task(self._watch(interval))
+        logger.info(f"Watching {settings.LEXICON_SOURCE} lexicon every {interval}s")
+    
+    async def stop_watching(self):
+        """Stop the background poller"""
+        if self._watch_task is None:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
+
+def _initial_lexicon() -> CompiledLexicon:
+    """Configured lexicon file, falling back to the bundled one"""
+    try:
+        return load_lexicon_file()
+    except Exception as e:
+        logger.error(f"Failed to load lexicon from {settings.LEXICON_PATH}: {e}")
+        return load_lexicon_file(DEFAULT_LEXICON_PATH)
+
+# Singleton registry, seeded from disk so workers never start without a lexicon
+lexicon_registry = LexiconRegistry(_initial_lexicon())
@@ -4,54 +4,67 @@ import re
 from loguru import logger
 from app.core.config import settings
 from app.models.user import MoodState
+from app.mental_health.lexicon import CompiledLexicon, lexicon_registry
+from app.mental_health.emotion_classifier import emotion_classifier_service
 from datetime import datetime
 
+# Sentence spans, including trailing terminators; a final unterminated sentence also matches
+SENTENCE_PATTERN = re.compile(r'[^.!?\n]*[.!?\n]+|[^.!?\n]+$')
+
 class MoodDetector:
     def __init__(self):
         self.sentiment_analyzer = SentimentIntensityAnalyzer()
         
-        # Crisis keywords and phrases
-        self.crisis_keywords = {
-            'high_risk': [
-                'kill myself', 'suicide', 'end my life', 'not worth living',
-                'better off dead', 'want to die', 'no point in living',
-                'end it all', 'overdose', 'jump off', 'hang myself',
-                'cut myself', 'self harm', 'hurt myself'
-            ],
-            'medium_risk': [
-                'hopeless', 'worthless', 'can\'t go on', 'give up',
-                'no hope', 'hate myself', 'hate my life', 'unbearable',
-                'can\'t take it', 'falling apart', 'breaking down'
-            ],
-            'warning_signs': [
-                'depressed', 'anxious', 'panic', 'scared', 'alone',
-                'isolated', 'nobody cares', 'burden', 'trapped',
-                'overwhelmed', 'exhausted', 'numb', 'empty'
-            ]
-        }
-        
-        # Positive indicators
-        self.positive_keywords = [
-            'better', 'improved', 'happy', 'grateful', 'hopeful',
-            'excited', 'proud', 'accomplished', 'peaceful', 'calm',
-            'confident', 'motivated', 'energized', 'blessed', 'content'
-        ]
-        
-        # Emotion categories
-        self.emotion_categories = {
-            'anxiety': ['anxious', 'worried', 'nervous', 'panic', 'stressed', 'tense', 'afraid', 'fearful'],
-            'depression': ['sad', 'depressed', 'down', 'hopeless', 'empty', 'numb', 'worthless'],
-            'anger': ['angry', 'furious', 'irritated', 'frustrated', 'annoyed', 'rage', 'mad'],
-            'joy': ['happy', 'joyful', 'excited', 'elated', 'cheerful', 'delighted', 'pleased'],
-            'fear': ['scared', 'terrified', 'frightened', 'alarmed', 'horrified', 'petrified'],
-            'sadness': ['sad', 'upset', 'disappointed', 'hurt', 'sorrowful', 'miserable'],
-            'disgust': ['disgusted', 'revolted', 'repulsed', 'sickened', 'nauseated'],
-            'surprise': ['surprised', 'amazed', 'astonished', 'shocked', 'stunned']
-        }
+        # Keyword lexicon is shared by all detectors and hot-swapped by the registry
+        self.lexicon_registry = lexicon_registry
+    
+    @property
+    def lexicon(self) -> CompiledLexicon:
+        """Currently active compiled lexicon"""
+        return self.lexicon_registry.current
+    
+    @property
+    def crisis_keywords(self) -> Dict[str, Tuple[str, ...]]:
+        return self.lexicon.crisis_keywords
     
-    def detect_mood(self, text: str) -> Dict[str, Any]:
-        """Detect mood and emotional state from text"""
+    @property
+    def positive_keywords(self) -> Tuple[str, ...]:
+        return self.lexicon.positive_keywords
+    
+    @property
+    def emotion_categories(self) -> Dict[str, Tuple[str, ...]]:
+        return self.lexicon.emotion_categories
+    
+    def detect_mood(self, text: str, chunked: Optional[bool] = None) -> Dict[str, Any]:
+        """Detect mood and emotional state from text
+        
+        In chunked mode (default for messages of MOOD_CHUNKED_MIN_CHARS or more)
+        sentence windows are scanned in order and analysis stops at the window
+        holding the first critical term. Only the crisis decision is preserved:
+        sentiment, emotions and mood state then describe the text up to that
+        window, not the whole message. Messages without a critical term are
+        scored over the full text exactly as in the default mode, so the scan
+        is pure overhead for them; chunking only pays off on crisis-bearing
+        text.
+        """
+        # Pin one lexicon for the whole analysis so a concurrent swap can't mix versions
+        lexicon = self.lexicon
+        
+        if chunked is None:
+            chunked = len(text) >= settings.MOOD_CHUNKED_MIN_CHARS
+        
         try:
+            analysis_mode = 'full'
+            if chunked:
+                critical_end = self._scan_for_critical(text, lexicon)
+                if critical_end is not None:
+                    # Later text can't lower a critical crisis level, but it would
+                    # still shift sentiment and emotions; those cover the prefix only
+                    text = text[:critical_end]
+                    analysis_mode = 'early_exit'
+                else:
+                    analysis_mode = 'chunked'
+            
             # Clean and normalize text
             text_lower = text.lower().strip()
             
@@ -59,10 +72,10 @@ class MoodDetector:
             sentiment_scores = self.sentiment_analyzer.polarity_scores(text)
             
             # Detect crisis indicators
-            crisis_level, crisis_keywords = self._detect_crisis_level(text_lower)
+            crisis_level, crisis_keywords = self._detect_crisis_level(text_lower, lexicon)
             
             # Detect emotions
-            emotions = self._detect_emotions(text_lower)
+            emotions = self._detect_emotions(text_lower, lexicon)
             
             # Calculate overall mood state
             mood_state = self._calculate_mood_state(
@@ -72,7 +85,7 @@ class MoodDetector:
             )
             
             # Detect positive indicators
-            positive_indicators = self._detect_positive_indicators(text_lower)
+            positive_indicators = self._detect_positive_indicators(text_lower, lexicon)
             
             return {
                 'mood_state': mood_state,
@@ -82,6 +95,9 @@ class MoodDetector:
                 'crisis_keywords_detected': crisis_keywords,
                 'positive_indicators': positive_indicators,
                 'confidence': self._calculate_confidence(sentiment_scores),
+                'lexicon_version': lexicon.version,
+                'analysis_mode': analysis_mode,
+                'analyzed_chars': len(text),
                 'timestamp': datetime.utcnow()
             }
             
@@ -92,25 +108,76 @@ class MoodDetector:
                 'sentiment_scores': {'compound': 0.0},
                 'emotions': {},
                 'crisis_level': 'low',
+                'lexicon_version': lexicon.version,
                 'error': str(e)
             }
     
-    def _detect_crisis_level(self, text: str) -> Tuple[str, List[str]]:
+    def _scan_for_critical(self, text: str, lexicon: CompiledLexicon) -> Optional[int]:
+        """End offset of the sentence window holding the first critical term, or None"""
+        pattern = lexicon.crisis_patterns['high_risk']
+        if pattern is None:
+            return None
+        
+        window_chars = settings.MOOD_CHUNK_WINDOW_CHARS
+        # Overlap windows so a phrase split across a boundary is still seen
+        overlap = max((len(keyword) for keyword in lexicon.crisis_keywords['high_risk']), default=1) - 1
+        
+        window_start = 0
+        for match in SENTENCE_PATTERN.finditer(text):
+            end = match.end()
+            if end - window_start < window_chars and end < len(text):
+                continue
+            
+            if pattern.search(text[max(window_start - overlap, 0):end].lower()):
+                return end
+            window_start = end
+        
+        return None
+    
+    async def refine_emotions(self, text: str, mood_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Blend in the local emotion classifier when the lexicon result is ambiguous or risky"""
+        mood_analysis.setdefault('emotion_source', 'lexicon')
+        
+        if not emotion_classifier_service.should_classify(mood_analysis):
+            return mood_analysis
+        
+        model_scores = await emotion_classifier_service.classify(text)
+        if not model_scores:
+            return mood_analysis
+        
+        weight = settings.EMOTION_CLASSIFIER_WEIGHT
+        lexicon_scores = mood_analysis.get('emotions') or {}
+        blended = {
+            emotion: (1 - weight) * lexicon_scores.get(emotion, 0.0) + weight * model_scores.get(emotion, 0.0)
+            for emotion in set(lexicon_scores) | set(model_scores)
+        }
+        total = sum(blended.values())
+        if total > 0:
+            blended = {k: v/total for k, v in blended.items() if v > 0}
+        
+        mood_analysis['emotions'] = blended
+        mood_analysis['emotion_source'] = 'classifier'
+        mood_analysis['mood_state'] = self._calculate_mood_state(
+            mood_analysis['sentiment_scores'],
+            mood_analysis['crisis_level'],
+            blended
+        )
+        
+        return mood_analysis
+    
+    def _detect_crisis_level(self, text: str, lexicon: Optional[CompiledLexicon] = None) -> Tuple[str, List[str]]:
         """Detect crisis level and keywords"""
+        lexicon = lexicon or self.lexicon
         detected_keywords = []
         
         # Check high risk keywords
-        for keyword in self.crisis_keywords['high_risk']:
-            if keyword in text:
-                detected_keywords.append(keyword)
+        detected_keywords.extend(self._match_group(text, lexicon.crisis_keywords['high_risk'], lexicon.crisis_patterns['high_risk']))
         
         if detected_keywords:
             return 'critical', detected_keywords
         
         # Check medium risk keywords
-        for keyword in self.crisis_keywords['medium_risk']:
-            if keyword in text:
-                detected_keywords.append(keyword)
+        detected_keywords.extend(self._match_group(text, lexicon.crisis_keywords['medium_risk'], lexicon.crisis_patterns['medium_risk']))
         
         if len(detected_keywords) >= 2:
             return 'high', detected_keywords
@@ -118,11 +185,9 @@ class MoodDetector:
             return 'medium', detected_keywords
         
         # Check warning signs
-        warning_count = 0
-        for keyword in self.crisis_keywords['warning_signs']:
-            if keyword in text:
-                detected_keywords.append(keyword)
-                warning_count += 1
+        warning_signs = self._match_group(text, lexicon.crisis_keywords['warning_signs'], lexicon.crisis_patterns['warning_signs'])
+        detected_keywords.extend(warning_signs)
+        warning_count = len(warning_signs)
         
         if warning_count >= 3:
             return 'medium', detected_keywords
@@ -131,23 +196,30 @@ class MoodDetector:
         
         return 'none', []
     
-    def _detect_emotions(self, text: str) -> Dict[str, float]:
+    @staticmethod
+    def _match_group(text: str, keywords: Tuple[str, ...], pattern: Optional[re.Pattern]) -> List[str]:
+        """Keywords contained in text, in lexicon order"""
+        # Single compiled scan rejects the common case of no match at all
+        if pattern is None or not pattern.search(text):
+            return []
+        return [keyword for keyword in keywords if keyword in text]
+    
+    def _detect_emotions(self, text: str, lexicon: Optional[CompiledLexicon] = None) -> Dict[str, float]:
         """Detect specific emotions in text"""
+        lexicon = lexicon or self.lexicon
         emotion_scores = {}
         
-        for emotion, keywords in self.emotion_categories.items():
+        for emotion, keywords in lexicon.emotion_categories.items():
             score = 0
-            keyword_count = 0
             
-            for keyword in keywords:
-                if keyword in text:
-                    keyword_count += 1
-                    # Weight by position in text (earlier = stronger)
-                    position = text.find(keyword)
-                    position_weight = 1.0 - (position / len(text)) * 0.3
-                    score += position_weight
+            matched = self._match_group(text, keywords, lexicon.emotion_patterns[emotion])
+            for keyword in matched:
+                # Weight by position in text (earlier = stronger)
+                position = text.find(keyword)
+                position_weight = 1.0 - (position / len(text)) * 0.3
+                score += position_weight
             
-            if keyword_count > 0:
+            if matched:
                 emotion_scores[emotion] = min(score / len(keywords), 1.0)
         
         # Normalize scores
@@ -157,15 +229,10 @@ class MoodDetector:
         
         return emotion_scores
     
-    def _detect_positive_indicators(self, text: str) -> List[str]:
+    def _detect_positive_indicators(self, text: str, lexicon: Optional[CompiledLexicon] = None) -> List[str]:
         """Detect positive indicators in text"""
-        found_indicators = []
-        
-        for indicator in self.positive_keywords:
-            if indicator in text:
-                found_indicators.append(indicator)
-        
-        return found_indicators
+        lexicon = lexicon or self.lexicon
+        return self._match_group(text, lexicon.positive_keywords, lexicon.positive_pattern)
     
     def _calculate_mood_state(
         self,
@@ -331,6 +398,7 @@ class CrisisInterventionSystem:
             'requires_immediate_intervention': crisis_level in ['critical', 'high'],
             'mood_analysis': mood_analysis,
             'intervention': intervention,
+            'lexicon_version': mood_analysis.get('lexicon_version'),
             'timestamp': datetime.utcnow()
         }
     
@@ -0,0 +1,183 @@
+"""Per-user mood history stored as daily bucket documents.
+
+Each chat message records a mood point. Points used to be `$push`ed onto
+`users.mood_history` without a cap, so every authenticated request loaded a
+user document that grew with chat volume. Points now live in the
+`mood_history` collection, one bucket per user per UTC day (a full bucket
+spills into another), indexed by (user_id, day). Reads cover a bounded day
+range and entry count.
+
+Migrate existing arrays (from backend/):
+    python -m app.mental_health.mood_history [--dry-run]
+"""
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+from loguru import logger
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.core.database import get_mood_history_collection, get_users_collection
+import json
+import time
+
+def bucket_day(timestamp: datetime) -> datetime:
+    """Start of the UTC day a timestamp falls in"""
+    return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Legacy entries may hold ISO strings instead of datetimes"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        # Stored timestamps are naive UTC
+        return parsed.replace(tzinfo=None) - (parsed.utcoffset() or timedelta(0))
+    return None
+
+class MoodHistoryStore:
+    """Append and read mood points in daily buckets"""
+    
+    def __init__(self, bucket_max_entries: Optional[int] = None):
+        self.bucket_max_entries = bucket_max_entries or settings.MOOD_HISTORY_BUCKET_MAX_ENTRIES
+    
+    async def record(
+        self,
+        user_id: str,
+        mood_state: Optional[str],
+        sentiment_score: float,
+        timestamp: Optional[datetime] = None
+    ):
+        """Append one mood point to the user's bucket for its day"""
+        timestamp = timestamp or datetime.utcnow()
+        # A full bucket no longer matches, so the upsert opens a new one
+        await get_mood_history_collection().update_one(
+            {"user_id": user_id, "day": bucket_day(timestamp), "count": {"$lt": self.bucket_max_entries}},
+            {
+                "$push": {"entries": {
+                    "timestamp": timestamp,
+                    "mood_state": mood_state,
+                    "sentiment_score": sentiment_score
+                }},
+                "$inc": {"count": 1},
+                "$min": {"start": timestamp},
+                "$max": {"end": timestamp}
+            },
+            upsert=True
+        )
+    
+    async def recent(
+        self,
+        user_id: str,
+        days: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Mood points in chronological order, from the last `days` days and at most the newest `limit`"""
+        query: Dict[str, Any] = {"user_id": user_id}
+        since = None
+        if days is not None:
+            since = datetime.utcnow() - timedelta(days=days)
+            query["day"] = {"$gte": bucket_day(since)}
+        
+        entries: List[Dict[str, Any]] = []
+        last_day = None
+        cursor = get_mood_history_collection().find(query, {"_id": 0, "day": 1, "entries": 1}).sort("day", -1)
+        async for bucket in cursor:
+            # Newest day first; a day may span several buckets, so only stop at a day boundary
+            if limit is not None and len(entries) >= limit and bucket["day"] < last_day:
+                break
+            entries.extend(bucket.get("entries", []))
+            last_day = bucket["day"]
+        
+        if since is not None:
+            entries = [entry for entry in entries if entry["timestamp"] >= since]
+        entries.sort(key=lambda entry: entry["timestamp"])
+        if limit is not None:
+            entries = entries[-limit:]
+        return entries
+    
+    async def migrate_user_arrays(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Move every `users.mood_history` array into buckets, then unset it
+        
+        Migrated buckets get deterministic ids and are written with
+        $setOnInsert, so an interrupted run can simply be repeated. String
+        timestamps are parsed; a user with any entry whose timestamp cannot
+        be read keeps the array, and the entries are counted as skipped.
+        """
+        started = time.perf_counter()
+        users_collection = get_users_collection()
+        history_collection = get_mood_history_collection()
+        report = {"users": 0, "entries": 0, "buckets": 0, "skipped_entries": 0, "users_kept": 0, "dry_run": dry_run}
+        
+        cursor = users_collection.find({"mood_history.0": {"$exists": True}}, {"mood_history": 1})
+        async for user in cursor:
+            user_id = str(user["_id"])
+            days: Dict[datetime, List[Dict[str, Any]]] = {}
+            skipped = 0
+            for entry in user["mood_history"]:
+                timestamp = parse_timestamp(entry.get("timestamp")) if isinstance(entry, dict) else None
+                if timestamp is None:
+                    skipped += 1
+                    continue
+                days.setdefault(bucket_day(timestamp), []).append({**entry, "timestamp": timestamp})
+            
+            operations = []
+            for day, entries in sorted(days.items()):
+                entries.sort(key=lambda entry: entry["timestamp"])
+                for offset in range(0, len(entries), self.bucket_max_entries):
+                    chunk = entries[offset:offset + self.bucket_max_entries]
+                    operations.append(UpdateOne(
+                        {"_id": f"{user_id}:{day.date().isoformat()}:legacy:{offset // self.bucket_max_entries}"},
+                        {"$setOnInsert": {
+                            "user_id": user_id,
+                            "day": day,
+                            "entries": chunk,
+                            "count": len(chunk),
+                            "start": chunk[0]["timestamp"],
+                            "end": chunk[-1]["timestamp"]
+                        }},
+                        upsert=True
+                    ))
+            
+            report["users"] += 1
+            report["entries"] += sum(len(entries) for entries in days.values())
+            report["buckets"] += len(operations)
+            report["skipped_entries"] += skipped
+            if skipped:
+                report["users_kept"] += 1
+                logger.warning(f"User {user_id}: {skipped} mood history entries have unreadable timestamps; array kept")
+            
+            if not dry_run:
+                if operations:
+                    await history_collection.bulk_write(operations, ordered=False)
+                # Unreadable entries would be lost, so the array stays until they are fixed
+                if not skipped:
+                    await users_collection.update_one({"_id": user["_id"]}, {"$unset": {"mood_history": ""}})
+        
+        report["seconds"] = time.perf_counter() - started
+        logger.info(f"Mood history migration: {report}")
+        return report
+
+# Singleton instance
+mood_history_store = MoodHistoryStore()
+
+async def _main(dry_run: bool):
+    from app.core.database import connect_to_mongo, close_mongo_connection
+    
+    await connect_to_mongo()
+    try:
+        report = await mood_history_store.migrate_user_arrays(dry_run=dry_run)
+        print(json.dumps(report, indent=2))
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    
+    parser = argparse.ArgumentParser(description="Move users.mood_history arrays into bucketed mood_history documents")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move without writing")
+    args = parser.parse_args()
+    
+    asyncio.run(_main(args.dry_run))
@@ -38,6 +38,7 @@ class Message(BaseModel):
     
     # Crisis Detection
     contains_crisis_language: bool = False
+    crisis_level: Optional[str] = None
     crisis_keywords_detected: List[str] = []
     
     # Therapeutic Elements
@@ -62,7 +62,6 @@ class UserInDB(UserBase):
     primary_concerns: List[str] = []
     therapy_goals: List[str] = []
     current_mood: Optional[MoodState] = None
-    mood_history: List[Dict[str, Any]] = []
     
     # Risk Assessment
     risk_level: str = "low"  # low, medium, high, critical
@@ -94,6 +93,28 @@ class UserInDB(UserBase):
 class User(UserInDB):
     pass
 
+class Principal(BaseModel):
+    """The authenticated caller: only the fields most endpoints read"""
+    id: str
+    username: str
+    role: UserRole = UserRole.USER
+    risk_level: str = "low"
+    primary_concerns: List[str] = []
+    therapy_goals: List[str] = []
+    current_mood: Optional[MoodState] = None
+    crisis_flag_count: int = 0
+
+# Projection that loads a Principal without the rest of the user document
+PRINCIPAL_PROJECTION = {
+    "username": 1,
+    "role": 1,
+    "risk_level": 1,
+    "primary_concerns": 1,
+    "therapy_goals": 1,
+    "current_mood": 1,
+    "crisis_flag_count": {"$size": {"$ifNull": ["$crisis_flags", []]}}
+}
+
 class UserResponse(BaseModel):
     id: str
     email: EmailStr
@@ -0,0 +1,133 @@
+"""Sentence embedding backends.
+
+`torch` is the stock SentenceTransformer model. `onnx` runs an int8
+dynamically quantized ONNX export of the same model on ONNX Runtime, with
+the same mean pooling and L2 normalisation, so its vectors live in the same
+space as the existing index without loading torch into the worker.
+
+Export the quantized model once (needs optimum[onnxruntime] and torch):
+    python -m app.rag.embedders export --output models/all-MiniLM-L6-v2-onnx-int8
+"""
+from typing import List, Optional, Union
+from pathlib import Path
+from loguru import logger
+from app.core.config import settings
+import numpy as np
+
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+class OnnxSentenceEmbedder:
+    """SentenceTransformer-compatible encoder on ONNX Runtime"""
+    
+    def __init__(self, model_dir: Path, max_length: int = 256, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        model_dir = Path(model_dir)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        
+        self.session = ort.InferenceSession(
+            str(model_dir / QUANTIZED_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+        logger.info(f"Loaded ONNX int8 embedder from {model_dir}")
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+        
+        # Mean pooling over real tokens, then L2 normalisation, as in the sentence-transformers pipeline
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+    
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Embed one text (1-D result) or a list of texts (2-D result)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        
+        # Length-sorted batches keep padding, and so wasted compute, low
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        embeddings = np.empty((len(texts), self._dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            embeddings[rows] = self._encode_batch([texts[row] for row in rows])
+        
+        return embeddings[0] if single else embeddings
+
+def export_onnx_model(model_name: str, output_dir: Path):
+    """Export model_name to ONNX and quantize it to int8 (dynamic, per-channel)"""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    
+    repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    output_dir = Path(output_dir)
+    
+    model = ORTModelForFeatureExtraction.from_pretrained(repo, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(repo).save_pretrained(output_dir)
+    
+    quantizer = ORTQuantizer.from_pretrained(output_dir)
+    quantizer.quantize(
+        save_dir=output_dir,
+        quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=True)
+    )
+    logger.info(f"Exported int8 ONNX model for {repo} to {output_dir}")
+
+def create_embedder(model_name: Optional[str] = None, backend: Optional[str] = None):
+    """Build the embedding backend selected in settings"""
+    model_name = model_name or settings.EMBEDDING_MODEL
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "onnx":
+        return OnnxSentenceEmbedder(
+            settings.EMBEDDING_ONNX_PATH,
+            max_length=settings.EMBEDDING_MAX_TOKENS,
+            threads=settings.EMBEDDING_ONNX_THREADS
+        )
+    if backend == "torch":
+        # Imported here so torch only loads when this backend is selected
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+def embedding_cache_namespace(model_name: Optional[str] = None, backend: Optional[str] = None) -> str:
+    """Cache namespace; quantized vectors differ slightly, so they never share entries"""
+    model_name = model_name or settings.EMBEDDING_MODEL
+    backend = backend or settings.EMBEDDING_BACKEND
+    return model_name if backend == "torch" else f"{model_name}-{backend}-int8"
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Embedding backend tools")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export = subcommands.add_parser("export", help="export and quantize the embedding model to ONNX")
+    export.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    export.add_argument("--output", type=Path, default=settings.EMBEDDING_ONNX_PATH)
+    args = parser.parse_args()
+    
+    export_onnx_model(args.model, args.output)
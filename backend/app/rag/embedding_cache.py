@@ -0,0 +1,183 @@
+from typing import Dict, List, Optional, Sequence
+from collections import OrderedDict
+from loguru import logger
+from app.core.config import settings
+from app.core.database import get_redis
+import numpy as np
+import unicodedata
+import hashlib
+import base64
+import threading
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys without changing what the model sees"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+class EmbeddingCache:
+    """Two-tier content-addressed embedding cache.
+    
+    Keys are a hash of (model name, normalized text). Tier one is an
+    in-process LRU; tier two is Redis, shared across workers and restarts.
+    Because the model name is part of every key, switching models can never
+    return a stale vector, and `check_model` purges the previous model's
+    entries from Redis.
+    """
+    
+    REDIS_PREFIX = "embcache"
+    
+    def __init__(self, model_name: str, max_entries: Optional[int] = None):
+        self.model_name = model_name
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_SIZE
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "redis": 0}
+        self.misses = 0
+    
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+    
+    def _redis_key(self, key: str) -> str:
+        return f"{self.REDIS_PREFIX}:{self.model_name}:{key}"
+    
+    def get_local(self, key: str) -> Optional[np.ndarray]:
+        """Look up the in-process tier only"""
+        with self._lock:
+            embedding = self._lru.get(key)
+            if embedding is not None:
+                self._lru.move_to_end(key)
+                self.hits["memory"] += 1
+            return embedding
+    
+    def put_local(self, key: str, embedding: np.ndarray):
+        with self._lock:
+            self._lru[key] = embedding
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+    
+    @staticmethod
+    def _encode(embedding: np.ndarray) -> str:
+        return base64.b64encode(embedding.tobytes()).decode("ascii")
+    
+    @staticmethod
+    def _decode(encoded: str) -> np.ndarray:
+        return np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+    
+    async def get(self, text: str) -> Optional[np.ndarray]:
+        """Return a cached embedding for text, or None on a miss"""
+        key = self.key(text)
+        
+        embedding = self.get_local(key)
+        if embedding is not None:
+            return embedding
+        
+        redis = get_redis()
+        if redis is not None:
+            try:
+                encoded = await redis.get(self._redis_key(key))
+                if encoded:
+                    embedding = self._decode(encoded)
+                    self.put_local(key, embedding)
+                    self.hits["redis"] += 1
+                    return embedding
+            except Exception as e:
+                logger.warning(f"Embedding cache read failed: {e}")
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, text: str, embedding: np.ndarray):
+        """Store an embedding in both tiers"""
+        key = self.key(text)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        self.put_local(key, embedding)
+        
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(
+                    self._redis_key(key),
+                    self._encode(embedding),
+                    ex=settings.EMBEDDING_CACHE_TTL_SECONDS
+                )
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+    
+    async def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached embeddings for texts (None per miss), with one MGET for all local misses"""
+        keys = [self.key(text) for text in texts]
+        embeddings = [self.get_local(key) for key in keys]
+        remote = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        redis = get_redis()
+        if remote and redis is not None:
+            try:
+                encoded = await redis.mget([self._redis_key(keys[i]) for i in remote])
+                for i, value in zip(remote, encoded):
+                    if value:
+                        embeddings[i] = self._decode(value)
+                        self.put_local(keys[i], embeddings[i])
+                        self.hits["redis"] += 1
+            except Exception as e:
+                logger.warning(f"Embedding cache read failed: {e}")
+        
+        self.misses += sum(1 for embedding in embeddings if embedding is None)
+        return embeddings
+    
+    async def set_many(self, texts: Sequence[str], embeddings: Sequence[np.ndarray]):
+        """Store many embeddings in both tiers, pipelining the Redis writes"""
+        if not texts:
+            return
+        
+        entries = []
+        for text, embedding in zip(texts, embeddings):
+            key = self.key(text)
+            embedding = np.asarray(embedding, dtype=np.float32)
+            self.put_local(key, embedding)
+            entries.append((key, embedding))
+        
+        redis = get_redis()
+        if redis is not None:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for key, embedding in entries:
+                        pipe.set(self._redis_key(key), self._encode(embedding), ex=settings.EMBEDDING_CACHE_TTL_SECONDS)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+    
+    async def check_model(self):
+        """Purge Redis entries written by a different embedding model"""
+        redis = get_redis()
+        if redis is None:
+            return
+        
+        marker = f"{self.REDIS_PREFIX}:active_model"
+        try:
+            previous = await redis.getset(marker, self.model_name)
+            if previous and previous != self.model_name:
+                removed = 0
+                async for stale_key in redis.scan_iter(match=f"{self.REDIS_PREFIX}:{previous}:*", count=500):
+                    await redis.delete(stale_key)
+                    removed += 1
+                logger.info(f"Embedding model changed {previous} -> {self.model_name}, purged {removed} cached vectors")
+        except Exception as e:
+            logger.warning(f"Embedding cache model check failed: {e}")
+    
+    def clear(self):
+        """Drop the in-process tier"""
+        with self._lock:
+            self._lru.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit-rate metrics for both tiers"""
+        hits = self.hits["memory"] + self.hits["redis"]
+        lookups = hits + self.misses
+        return {
+            "model": self.model_name,
+            "entries": len(self._lru),
+            "memory_hits": self.hits["memory"],
+            "redis_hits": self.hits["redis"],
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,71 @@
+from typing import List, Dict, Any, Iterable, Optional, Sequence
+
+def normalize_concerns(concerns: Optional[Iterable[str]]) -> List[str]:
+    """Lowercased, de-duplicated, sorted concern terms (stable for cache keys)"""
+    return sorted({concern.strip().lower().replace(' ', '_') for concern in concerns or [] if concern and concern.strip()})
+
+def concerns_from_context(user_context: Optional[Dict[str, Any]]) -> List[str]:
+    """Concerns known before retrieval: profile concerns plus detected emotion categories"""
+    if not user_context:
+        return []
+    return normalize_concerns([
+        *(user_context.get('primary_concerns') or []),
+        *(user_context.get('detected_emotions') or [])
+    ])
+
+def document_concerns(metadata: Dict[str, Any]) -> List[str]:
+    """Partition keys of a document: its category and tags"""
+    return normalize_concerns([metadata.get('category', ''), *(metadata.get('tags') or [])])
+
+def matches_concerns(metadata: Dict[str, Any], concerns: Sequence[str]) -> bool:
+    """Whether the document's category or any tag is one of the concerns"""
+    return not concerns or any(key in concerns for key in document_concerns(metadata))
+
+def pinecone_filter(concerns: Sequence[str]) -> Dict[str, Any]:
+    """Metadata filter matching category or tags against the concerns"""
+    return {"$or": [
+        {"category": {"$in": list(concerns)}},
+        {"tags": {"$in": list(concerns)}}
+    ]}
+
+def best_relevance(contexts: List[Dict[str, Any]]) -> Optional[float]:
+    """Highest underlying similarity (cosine or BM25, not the fused rank score), if known"""
+    scores = [ctx['relevance'] for ctx in contexts if ctx.get('relevance') is not None]
+    return max(scores) if scores else None
+
+def is_weak(contexts: List[Dict[str, Any]], min_score: Optional[float]) -> bool:
+    """Whether the best relevance is below min_score; unknown relevance is not judged"""
+    if min_score is None:
+        return False
+    if not contexts:
+        return True
+    best = best_relevance(contexts)
+    return best is not None and best < min_score
+
+def needs_fallback(filtered: List[Dict[str, Any]], top_k: int, min_score: Optional[float] = None) -> bool:
+    """Whether filtered results are too few, or their best relevance below min_score"""
+    return len(filtered) < top_k or is_weak(filtered, min_score)
+
+def with_fallback(
+    filtered: List[Dict[str, Any]],
+    unfiltered: List[Dict[str, Any]],
+    top_k: int,
+    min_score: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """Combine filtered results with an unfiltered search
+    
+    When the best filtered relevance is below min_score the unfiltered
+    ranking wins outright. Otherwise filtered matches keep their lead and
+    unfiltered ones fill the remaining slots.
+    """
+    if is_weak(filtered, min_score):
+        return unfiltered[:top_k]
+    
+    seen = {(ctx.get('source'), ctx.get('content')) for ctx in filtered}
+    combined = list(filtered)
+    for ctx in unfiltered:
+        if len(combined) >= top_k:
+            break
+        if (ctx.get('source'), ctx.get('content')) not in seen:
+            combined.append(ctx)
+    return combined
@@ -0,0 +1,88 @@
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Sequence
+from loguru import logger
+from app.core.config import settings
+from app.rag.lexical_index import BM25Index
+from app.rag.vector_store import VectorStore
+import numpy as np
+import asyncio
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> Dict[str, float]:
+    """Fuse ranked id lists: score(d) = sum over lists of 1 / (k + rank)"""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+class HybridRetriever:
+    """Lexical BM25 plus vector retrieval fused with reciprocal rank fusion.
+    
+    Both searches run concurrently, so the hybrid result costs roughly the
+    slower of the two rather than their sum. Exact terms ("TIPP", "4-7-8")
+    are carried by BM25, paraphrases by the embedding search.
+    """
+    
+    def __init__(
+        self,
+        lexical_index: BM25Index,
+        vector_store: VectorStore,
+        embed: Callable[[str], Awaitable[np.ndarray]]
+    ):
+        self.lexical_index = lexical_index
+        self.vector_store = vector_store
+        self.embed = embed
+    
+    async def _lexical(self, query: str, candidates: int, concerns: Optional[Sequence[str]]) -> List[Dict[str, Any]]:
+        results = self.lexical_index.search(query, top_k=candidates, concerns=concerns)
+        return [
+            {'id': doc['id'], 'score': score, 'metadata': doc}
+            for doc, score in results
+        ]
+    
+    async def _vector(self, query: str, candidates: int, concerns: Optional[Sequence[str]]) -> List[Dict[str, Any]]:
+        embedding = await self.embed(query)
+        return await self.vector_store.aquery(embedding.tolist(), top_k=candidates, concerns=concerns)
+    
+    async def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        concerns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Fused top_k contexts in the shape generate_response consumes"""
+        candidates = max(top_k, settings.HYBRID_CANDIDATES)
+        
+        lexical, vector = await asyncio.gather(
+            self._lexical(query, candidates, concerns),
+            self._vector(query, candidates, concerns),
+            return_exceptions=True
+        )
+        
+        rankings = []
+        metadata: Dict[str, Dict[str, Any]] = {}
+        # Cosine similarity survives fusion so callers can judge match quality; None if the vector side failed
+        similarity: Optional[Dict[str, float]] = None
+        if not isinstance(vector, Exception):
+            similarity = {match['id']: match['score'] for match in vector}
+        for name, matches in (("lexical", lexical), ("vector", vector)):
+            if isinstance(matches, Exception):
+                # One side failing degrades to the other instead of returning nothing
+                logger.warning(f"Hybrid {name} retrieval failed: {matches}")
+                continue
+            rankings.append([match['id'] for match in matches])
+            for match in matches:
+                metadata.setdefault(match['id'], match['metadata'])
+        
+        fused = reciprocal_rank_fusion(rankings, k=settings.HYBRID_RRF_K)
+        best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        
+        return [
+            {
+                'content': metadata[doc_id].get('content', ''),
+                'category': metadata[doc_id].get('category', ''),
+                'score': score,
+                'relevance': similarity.get(doc_id, 0.0) if similarity is not None else None,
+                'source': metadata[doc_id].get('source', '')
+            }
+            for doc_id, score in best
+        ]
@@ -0,0 +1,240 @@
+"""Incremental knowledge-base ingestion.
+
+Streams documents from a directory of JSONL and Markdown files, chunks long
+documents, and compares each chunk's content hash with the manifest stored in
+the `knowledge_chunks` collection. Only new or changed chunks are embedded and
+upserted; chunks whose source disappeared are deleted. With the local vector
+backend and KNOWLEDGE_SNAPSHOT_DIR set, the result is published as a new
+memory-mapped snapshot version (see app/rag/snapshot.py). Each chunk's
+lexical fields are kept in the manifest so every worker can rebuild its
+in-process BM25 index from it at startup.
+
+Usage (from backend/):
+    python -m app.rag.ingestion path/to/knowledge [--dry-run]
+"""
+from typing import List, Dict, Any, Iterator, Optional
+from datetime import datetime
+from pathlib import Path
+from loguru import logger
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.core.database import get_knowledge_chunks_collection
+import hashlib
+import json
+import re
+import time
+
+MARKDOWN_SUFFIXES = {".md", ".markdown"}
+JSONL_SUFFIXES = {".jsonl"}
+
+def ingest_base(root: Path) -> Path:
+    """Directory chunk ids are relative to: KNOWLEDGE_INGEST_ROOT when root is inside it"""
+    root = Path(root).resolve()
+    base = settings.KNOWLEDGE_INGEST_ROOT.resolve()
+    return base if root == base or base in root.parents else root
+
+def iter_source_documents(root: Path, base: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """Yield documents from every JSONL and Markdown file under root, identified relative to base"""
+    base = base or root
+    for path in sorted(root.rglob("*")):
+        if not path.is_file():
+            continue
+        relative = path.relative_to(base).as_posix()
+        suffix = path.suffix.lower()
+        
+        if suffix in JSONL_SUFFIXES:
+            with open(path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        doc = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping {relative}:{line_number}: {e}")
+                        continue
+                    if not doc.get('content'):
+                        continue
+                    doc['source_id'] = f"{relative}#{doc.get('id') or line_number}"
+                    doc.setdefault('source', relative)
+                    yield doc
+        
+        elif suffix in MARKDOWN_SUFFIXES:
+            content = path.read_text(encoding="utf-8").strip()
+            if not content:
+                continue
+            title = re.match(r"#\s+(.+)", content)
+            yield {
+                'source_id': relative,
+                'source': relative,
+                'content': content,
+                'title': title.group(1).strip() if title else path.stem,
+                'category': path.parent.name if path.parent != base else 'general',
+                'type': 'guidance',
+                'tags': []
+            }
+
+def chunk_text(text: str, max_chars: int, overlap: int) -> List[str]:
+    """Split text on paragraph boundaries into chunks of at most max_chars"""
+    if not 0 <= overlap < max_chars:
+        raise ValueError(f"Chunk overlap {overlap} must be at least 0 and smaller than {max_chars}")
+    if len(text) <= max_chars:
+        return [text]
+    
+    chunks = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        # Paragraphs longer than a chunk are cut hard with a small overlap
+        while len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars - overlap:]
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    
+    return chunks
+
+def content_hash(doc: Dict[str, Any]) -> str:
+    """Hash of everything that ends up in the stored vector"""
+    payload = json.dumps({
+        'content': doc['content'],
+        'category': doc.get('category', 'general'),
+        'source': doc.get('source', 'unknown'),
+        'type': doc.get('type', 'knowledge'),
+        'tags': doc.get('tags', [])
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def iter_chunks(root: Path, base: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """Yield chunk documents with stable ids and content hashes"""
+    for doc in iter_source_documents(root, base):
+        pieces = chunk_text(doc['content'], settings.INGEST_CHUNK_CHARS, settings.INGEST_CHUNK_OVERLAP)
+        for position, piece in enumerate(pieces):
+            chunk = {k: v for k, v in doc.items() if k not in ('id', 'source_id', 'content')}
+            chunk['id'] = f"{doc['source_id']}::{position}"
+            chunk['content'] = piece
+            chunk['content_hash'] = content_hash(chunk)
+            yield chunk
+
+def lexical_fields(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """What other workers need to rebuild their BM25 index from the manifest"""
+    return {
+        'content': chunk['content'],
+        'category': chunk.get('category', 'general'),
+        'source': chunk.get('source', 'unknown'),
+        'type': chunk.get('type', 'knowledge'),
+        'tags': chunk.get('tags', []),
+        'keywords': chunk.get('keywords', [])
+    }
+
+class KnowledgeIngestor:
+    """Synchronise a knowledge directory into the RAG engine's indexes"""
+    
+    def __init__(self, rag_engine):
+        self.rag_engine = rag_engine
+    
+    async def ingest(self, root: Path, dry_run: bool = False) -> Dict[str, Any]:
+        """Ingest root, returning counts of unchanged, upserted and deleted chunks
+        
+        Ids are relative to KNOWLEDGE_INGEST_ROOT, so ingesting a subdirectory
+        keeps its chunks' ids and only considers (and deletes) chunks under it.
+        """
+        started = time.perf_counter()
+        collection = get_knowledge_chunks_collection()
+        root = Path(root).resolve()
+        base = ingest_base(root)
+        prefix = root.relative_to(base).as_posix() if root != base else ""
+        scope = {"_id": {"$regex": f"^{re.escape(prefix)}/"}} if prefix else {}
+        
+        # Manifest of what is already stored under root: chunk id -> content hash
+        manifest: Dict[str, Optional[str]] = {}
+        async for entry in collection.find(scope, {"_id": 1, "content_hash": 1, "document.category": 1}):
+            # Entries from before lexical fields were recorded are re-stored once
+            manifest[entry["_id"]] = entry["content_hash"] if "document" in entry else None
+        
+        seen = set()
+        changed: List[Dict[str, Any]] = []
+        for chunk in iter_chunks(root, base):
+            seen.add(chunk['id'])
+            if manifest.get(chunk['id']) != chunk['content_hash']:
+                changed.append(chunk)
+        
+        removed = [chunk_id for chunk_id in manifest if chunk_id not in seen]
+        
+        report = {
+            'root': str(root),
+            'chunks_seen': len(seen),
+            'unchanged': len(seen) - len(changed),
+            'upserted': len(changed),
+            'deleted': len(removed),
+            'dry_run': dry_run
+        }
+        
+        if not dry_run:
+            if changed:
+                stored = await self.rag_engine.store_knowledge(changed)
+                report['docs_per_second'] = stored['docs_per_second']
+                
+                now = datetime.utcnow()
+                await collection.bulk_write([
+                    UpdateOne(
+                        {"_id": chunk['id']},
+                        {"$set": {
+                            "content_hash": chunk['content_hash'],
+                            "source": chunk.get('source'),
+                            "document": lexical_fields(chunk),
+                            "ingested_at": now
+                        }},
+                        upsert=True
+                    )
+                    for chunk in changed
+                ], ordered=False)
+            
+            if removed:
+                await self.rag_engine.delete_knowledge(removed)
+                await collection.delete_many({"_id": {"$in": removed}})
+            
+            if changed or removed:
+                # Other workers map the new snapshot instead of re-embedding
+                version = await self.rag_engine.publish_snapshot()
+                if version:
+                    report['snapshot_version'] = version
+        
+        report['seconds'] = time.perf_counter() - started
+        logger.info(f"Knowledge ingestion: {report}")
+        return report
+
+async def _main(root: Path, dry_run: bool):
+    from app.core.database import connect_to_mongo, close_mongo_connection, connect_to_redis, close_redis_connection
+    from app.rag.rag_engine import warmup_rag_engine
+    
+    await connect_to_mongo()
+    await connect_to_redis()
+    try:
+        # Warmup seeds an empty local store, so a published snapshot keeps the bundled documents
+        report = await KnowledgeIngestor(await warmup_rag_engine()).ingest(root, dry_run=dry_run)
+        print(json.dumps(report, indent=2))
+    finally:
+        await close_mongo_connection()
+        await close_redis_connection()
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    
+    parser = argparse.ArgumentParser(description="Incrementally ingest a knowledge directory")
+    parser.add_argument("root", type=Path, help="directory of .jsonl and .md files")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    args = parser.parse_args()
+    
+    asyncio.run(_main(args.root, args.dry_run))
@@ -0,0 +1,176 @@
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
+from collections import Counter, defaultdict
+from pathlib import Path
+from loguru import logger
+from app.core.config import settings
+from app.rag.filters import matches_concerns
+import heapq
+import json
+import math
+import re
+import threading
+
+DEFAULT_KNOWLEDGE_BASE_PATH = Path(__file__).parent / "data" / "knowledge_base.json"
+
+# Words with internal hyphens or apostrophes stay whole ("4-7-8", "can't")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be because been but by can do does feel feeling for from had has have how
+i i'm im if in into is it its just like me my of on or really so that the their them then there
+these they this to very was we were what when which while who will with you your
+""".split())
+
+# Longest suffix first; keeps anxious/anxiety, sleep/sleeping, depressed/depression together
+SUFFIXES = (
+    'fulness', 'ational', 'iveness', 'ization', 'ation', 'iety', 'ious', 'ness', 'ment',
+    'ing', 'ion', 'ity', 'ous', 'ies', 'ied', 'ed', 'ly', 'es', 's'
+)
+
+def stem(token: str) -> str:
+    """Crude suffix stripping, enough to join common inflections"""
+    if token.endswith('ss'):
+        return token
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed terms without stopwords
+    
+    Hyphenated terms are indexed whole and as their parts, so "4-7-8" matches
+    exactly while "4 7 8" still overlaps.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(stem(token))
+        if '-' in token:
+            terms.extend(stem(part) for part in token.split('-') if part and part not in STOPWORDS)
+    return terms
+
+def document_text(doc: Dict[str, Any]) -> str:
+    """Fields that are searchable for a knowledge document"""
+    return " ".join([
+        doc.get('content', ''),
+        doc.get('category', ''),
+        " ".join(doc.get('tags', [])),
+        " ".join(doc.get('keywords', []))
+    ])
+
+def load_knowledge_documents(path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Load the knowledge base documents from JSON"""
+    path = Path(path or settings.KNOWLEDGE_BASE_PATH or DEFAULT_KNOWLEDGE_BASE_PATH)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    documents = data['documents'] if isinstance(data, dict) else data
+    logger.info(f"Loaded {len(documents)} knowledge documents from {path}")
+    return documents
+
+class BM25Index:
+    """In-memory Okapi BM25 inverted index.
+    
+    Postings map each term to (doc slot, term frequency) pairs, so a query
+    only touches documents sharing at least one term with it. IDF is derived
+    from document frequencies at query time, which keeps adds and removes
+    incremental.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._doc_lengths: Dict[int, int] = {}
+        self._documents: Dict[int, Dict[str, Any]] = {}
+        self._slots: Dict[str, int] = {}
+        self._next_slot = 0
+        self._total_length = 0
+        # Per-document length normalisation, rebuilt lazily after changes
+        self._norms: Optional[Dict[int, float]] = None
+    
+    def __len__(self) -> int:
+        return len(self._documents)
+    
+    def _remove_slot(self, slot: int):
+        for term in set(tokenize(document_text(self._documents[slot]))):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(slot)
+        del self._documents[slot]
+        self._norms = None
+    
+    def add_documents(self, documents: Iterable[Dict[str, Any]]):
+        """Index documents, replacing any with the same id"""
+        with self._lock:
+            for doc in documents:
+                doc_id = doc.get('id') or f"doc_{self._next_slot}"
+                if doc_id in self._slots:
+                    self._remove_slot(self._slots[doc_id])
+                
+                slot = self._next_slot
+                self._next_slot += 1
+                terms = Counter(tokenize(document_text(doc)))
+                for term, frequency in terms.items():
+                    self._postings[term][slot] = frequency
+                
+                length = sum(terms.values())
+                self._doc_lengths[slot] = length
+                self._total_length += length
+                self._documents[slot] = {**doc, 'id': doc_id}
+                self._slots[doc_id] = slot
+            self._norms = None
+    
+    def remove_documents(self, ids: Iterable[str]):
+        """Drop documents by id"""
+        with self._lock:
+            for doc_id in ids:
+                slot = self._slots.pop(doc_id, None)
+                if slot is not None:
+                    self._remove_slot(slot)
+    
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        concerns: Optional[Sequence[str]] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Top-k (document, score) pairs with a positive BM25 score
+        
+        With concerns, only documents whose category or tags include one of
+        them are ranked; IDF still reflects the whole index.
+        """
+        terms = set(tokenize(query))
+        if not terms or not self._documents:
+            return []
+        
+        with self._lock:
+            total_docs = len(self._documents)
+            if self._norms is None:
+                average_length = (self._total_length / total_docs) or 1.0
+                self._norms = {
+                    slot: self.k1 * (1 - self.b + self.b * length / average_length)
+                    for slot, length in self._doc_lengths.items()
+                }
+            norms = self._norms
+            k1_plus_1 = self.k1 + 1
+            scores: Dict[int, float] = defaultdict(float)
+            
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for slot, frequency in postings.items():
+                    scores[slot] += idf * frequency * k1_plus_1 / (frequency + norms[slot])
+            
+            candidates = scores.items()
+            if concerns:
+                candidates = [(slot, score) for slot, score in candidates if matches_concerns(self._documents[slot], concerns)]
+            best = heapq.nlargest(top_k, candidates, key=lambda item: item[1])
+            return [(self._documents[slot], score) for slot, score in best]
@@ -0,0 +1,129 @@
+from typing import AsyncIterator, Optional
+from abc import ABC, abstractmethod
+from loguru import logger
+from app.core.config import settings
+import asyncio
+import hashlib
+import random
+import re
+
+class LLMProvider(ABC):
+    """Text generation backend used by the RAG engines"""
+    
+    name: str = "base"
+    
+    @abstractmethod
+    async def generate(self, prompt: str) -> str:
+        """Return the full completion for prompt"""
+    
+    @abstractmethod
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the completion for prompt in chunks as they are produced"""
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini via google-generativeai's async API"""
+    
+    name = "gemini"
+    
+    def __init__(self, model: Optional[str] = None):
+        import google.generativeai as genai
+        
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(model or settings.MODEL)
+    
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+    
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+STUB_SENTENCES = (
+    "Thank you for sharing that with me; it takes courage to put these feelings into words.",
+    "It sounds like you have been carrying a lot lately, and that would be hard for anyone.",
+    "**One thing you could try right now** is a slow breath: in for 4 counts, hold for 7, out for 8.",
+    "- Notice five things you can see around you.\n- Name one small task you can finish today.",
+    "> Your feelings are valid, and you do not have to work through them alone.",
+    "Would you like to tell me more about when these feelings are strongest?",
+    "If things ever feel unsafe, please reach out to 988 or someone you trust right away.",
+    "Small, consistent steps tend to help more than big changes all at once.",
+)
+
+# JSON skeleton the engines put after "Format as JSON:" in structured prompts
+JSON_TEMPLATE = re.compile(r"Format as JSON:\s*(\{.*\})", re.DOTALL)
+
+class StubProvider(LLMProvider):
+    """Deterministic offline provider for load tests and benchmarks.
+    
+    The completion depends only on the prompt (structured prompts get their
+    JSON skeleton back, so parsing paths are exercised). Latency is drawn
+    from a configurable distribution: time to first token, then
+    LLM_STUB_TOKENS_PER_SECOND for the rest; `generate` waits for the whole
+    completion, `stream` paces it out word by word.
+    """
+    
+    name = "stub"
+    
+    def __init__(
+        self,
+        distribution: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        sigma: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        self.distribution = distribution or settings.LLM_STUB_LATENCY_DISTRIBUTION
+        self.latency_ms = settings.LLM_STUB_LATENCY_MS if latency_ms is None else latency_ms
+        self.sigma = settings.LLM_STUB_LATENCY_SIGMA if sigma is None else sigma
+        self.tokens_per_second = tokens_per_second or settings.LLM_STUB_TOKENS_PER_SECOND
+        self._rng = random.Random(settings.LLM_STUB_SEED if seed is None else seed)
+    
+    def first_token_seconds(self) -> float:
+        """Sample time to first token"""
+        median = self.latency_ms / 1000.0
+        if self.distribution == "fixed" or median <= 0:
+            return max(median, 0.0)
+        if self.distribution == "uniform":
+            return self._rng.uniform(median * (1 - self.sigma), median * (1 + self.sigma))
+        if self.distribution == "lognormal":
+            return self._rng.lognormvariate(0.0, self.sigma) * median
+        raise ValueError(f"Unknown stub latency distribution: {self.distribution}")
+    
+    def completion(self, prompt: str) -> str:
+        """Deterministic completion for prompt"""
+        template = JSON_TEMPLATE.search(prompt)
+        if template:
+            return template.group(1)
+        
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        rng = random.Random(digest)
+        return "\n\n".join(rng.sample(STUB_SENTENCES, k=4))
+    
+    def _token_seconds(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+    
+    async def generate(self, prompt: str) -> str:
+        text = self.completion(prompt)
+        await asyncio.sleep(self.first_token_seconds() + len(text.split()) * self._token_seconds())
+        return text
+    
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        words = self.completion(prompt).split(" ")
+        await asyncio.sleep(self.first_token_seconds())
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self._token_seconds())
+            yield word if i == len(words) - 1 else word + " "
+
+def create_llm_provider(provider: Optional[str] = None) -> LLMProvider:
+    """Build the LLM provider selected in settings"""
+    provider = provider or settings.LLM_PROVIDER
+    if provider == "gemini":
+        return GeminiProvider()
+    if provider == "stub":
+        logger.warning("Using the stub LLM provider; responses are canned")
+        return StubProvider()
+    raise ValueError(f"Unknown LLM provider: {provider}")
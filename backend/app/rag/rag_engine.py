@@ -1,32 +1,71 @@
-import google.generativeai as genai
-from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 import numpy as np
 from loguru import logger
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from app.core.config import settings
+from app.rag.llm_providers import create_llm_provider
+from app.mental_health.conversation_analyzer import conversation_analyzer
+from app.rag.vector_store import create_vector_store, LocalVectorStore
+from app.rag.snapshot import KnowledgeSnapshot, SnapshotWatcher, current_version, open_snapshot, prune_snapshots, write_snapshot
+from app.rag.embedding_cache import EmbeddingCache
+from app.rag.embedders import create_embedder, embedding_cache_namespace
+from app.rag.lexical_index import BM25Index, load_knowledge_documents
+from app.rag.hybrid_retriever import HybridRetriever
+from app.rag.retrieval_cache import RetrievalCache
+from app.rag.filters import concerns_from_context, normalize_concerns, needs_fallback, with_fallback
+from app.core.batching import MicroBatcher
+from app.core.database import get_knowledge_chunks_collection
 import json
+import time
+import threading
+
+def _raise_first_failure(done: Set[asyncio.Task]):
+    """Retrieve every finished task's exception, then raise the first"""
+    errors = [task.exception() for task in done]
+    for error in errors:
+        if error is not None:
+            raise error
 
 class RAGEngine:
     def __init__(self):
-        # Initialize Gemini
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.llm = genai.GenerativeModel(settings.MODEL)
+        # Initialize the LLM provider (Gemini, or the offline stub)
+        self.llm = create_llm_provider()
+        
+        # Initialize embedding model (torch SentenceTransformer or int8 ONNX)
+        self.embedder = create_embedder()
+        self.embedding_cache = EmbeddingCache(embedding_cache_namespace())
         
-        # Initialize Pinecone
-        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+        # Initialize retrieval backend (Pinecone or in-process index)
+        self.vector_store = create_vector_store(self.embedder.get_sentence_embedding_dimension())
         
-        # Initialize or get index
-        self._initialize_pinecone_index()
+        # Published memory-mapped snapshot, if the local backend has one
+        self.snapshot_version: Optional[str] = None
+        snapshot = self._open_snapshot()
         
-        # Initialize embedding model
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+        # Lexical index for hybrid retrieval, seeded from the snapshot or the bundled knowledge base
+        self.lexical_index = BM25Index()
+        self.lexical_index.add_documents(snapshot.documents() if snapshot else load_knowledge_documents())
+        self.hybrid_retriever = HybridRetriever(self.lexical_index, self.vector_store, self.embed_text)
+        if snapshot:
+            self.vector_store.load_snapshot(snapshot)
+            self.snapshot_version = snapshot.version
+            logger.info(f"Serving knowledge snapshot {snapshot.version}")
+        self.retrieval_cache = RetrievalCache()
         
         # Thread pool for CPU-bound operations
         self.executor = ThreadPoolExecutor(max_workers=4)
         
+        # Query embeddings arriving within a few milliseconds share one encode call
+        self.embedding_batcher = MicroBatcher(
+            self._encode_batch,
+            max_batch_size=settings.EMBEDDING_COALESCE_MAX_BATCH,
+            max_wait_ms=settings.EMBEDDING_COALESCE_MAX_WAIT_MS,
+            executor=self.executor,
+            name="query embedding"
+        )
+        
         # System prompts
         self.system_prompts = {
             "therapeutic": """You are a compassionate and professional mental health support assistant. 
@@ -65,98 +104,269 @@ class RAGEngine:
             Your response should be immediate, caring, and action-oriented."""
         }
     
-    def _initialize_pinecone_index(self):
-        """Initialize Pinecone index"""
-        try:
-            # Check if index exists
-            existing_indexes = self.pc.list_indexes()
-            
-            if settings.PINECONE_INDEX not in [idx.name for idx in existing_indexes]:
-                # Create index
-                self.pc.create_index(
-                    name=settings.PINECONE_INDEX,
-                    dimension=384,  # all-MiniLM-L6-v2 dimension
-                    metric='cosine',
-                    spec=ServerlessSpec(
-                        cloud='aws',
-                        region='us-east-1'
-                    )
-                )
-                logger.info(f"Created Pinecone index: {settings.PINECONE_INDEX}")
-            
-            self.index = self.pc.Index(settings.PINECONE_INDEX)
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize Pinecone: {e}")
-            raise
-    
     async def embed_text(self, text: str) -> np.ndarray:
         """Generate embeddings for text"""
-        loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(
-            self.executor,
-            self.embedder.encode,
-            text
-        )
+        cached = await self.embedding_cache.get(text)
+        if cached is not None:
+            return cached
+        
+        embedding = await self.embedding_batcher.submit(text)
+        await self.embedding_cache.set(text, embedding)
         return embedding
     
-    async def store_knowledge(self, documents: List[Dict[str, Any]]):
-        """Store mental health knowledge in vector database"""
+    def _encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        return list(self.embedder.encode(texts, batch_size=settings.EMBEDDING_COALESCE_MAX_BATCH))
+    
+    def embedding_stats(self) -> Dict[str, Any]:
+        """Embedding and retrieval cache hit rates and query coalescing histograms"""
+        return {
+            'cache': self.embedding_cache.stats(),
+            'coalescer': self.embedding_batcher.stats(),
+            'retrieval_cache': self.retrieval_cache.stats()
+        }
+    
+    async def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Generate embeddings for many texts with batched encode calls"""
+        embeddings: List[Optional[np.ndarray]] = await self.embedding_cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            loop = asyncio.get_event_loop()
+            encoded = await loop.run_in_executor(
+                self.executor,
+                partial(
+                    self.embedder.encode,
+                    [texts[i] for i in missing],
+                    batch_size=settings.EMBEDDING_BATCH_SIZE
+                )
+            )
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+            await self.embedding_cache.set_many([texts[i] for i in missing], encoded)
+        
+        return embeddings
+    
+    def _build_vectors(self, documents: List[Dict[str, Any]], embeddings: List[np.ndarray], offset: int) -> List[Dict[str, Any]]:
+        """Pair documents with their embeddings in vector store format"""
+        vectors = []
+        for position, (doc, embedding) in enumerate(zip(documents, embeddings)):
+            vectors.append({
+                'id': doc.get('id', f"doc_{offset + position}"),
+                'values': embedding.tolist(),
+                'metadata': {
+                    'content': doc['content'],
+                    'category': doc.get('category', 'general'),
+                    'source': doc.get('source', 'unknown'),
+                    'type': doc.get('type', 'knowledge'),
+                    'tags': doc.get('tags', []),
+                    # BM25 indexes keywords; without them a re-store would drop them from the lexical side
+                    'keywords': doc.get('keywords', [])
+                }
+            })
+        return vectors
+    
+    async def store_knowledge(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Store mental health knowledge in vector database
+        
+        Documents are embedded in batches of INGEST_BATCH_SIZE; upserts of
+        earlier batches run concurrently while later batches are embedded.
+        """
         try:
-            vectors = []
+            started = time.perf_counter()
+            batch_size = settings.INGEST_BATCH_SIZE
+            pending_upserts: Set[asyncio.Task] = set()
+            stored = 0
             
-            for doc in documents:
-                # Generate embedding
-                embedding = await self.embed_text(doc['content'])
+            try:
+                for i in range(0, len(documents), batch_size):
+                    batch = documents[i:i + batch_size]
+                    embeddings = await self.embed_batch([doc['content'] for doc in batch])
+                    vectors = self._build_vectors(batch, embeddings, offset=i)
+                    
+                    # Keep a bounded number of upserts in flight while the next batch embeds
+                    if len(pending_upserts) >= settings.INGEST_MAX_INFLIGHT_UPSERTS:
+                        done, pending_upserts = await asyncio.wait(pending_upserts, return_when=asyncio.FIRST_COMPLETED)
+                        _raise_first_failure(done)
+                    pending_upserts.add(asyncio.create_task(self.vector_store.aupsert(vectors)))
+                    self.lexical_index.add_documents([{**vector['metadata'], 'id': vector['id']} for vector in vectors])
+                    stored += len(vectors)
                 
-                # Prepare vector
-                vector = {
-                    'id': doc.get('id', f"doc_{len(vectors)}"),
-                    'values': embedding.tolist(),
-                    'metadata': {
-                        'content': doc['content'],
-                        'category': doc.get('category', 'general'),
-                        'source': doc.get('source', 'unknown'),
-                        'type': doc.get('type', 'knowledge'),
-                        'tags': doc.get('tags', [])
-                    }
-                }
-                vectors.append(vector)
+                if pending_upserts:
+                    done, pending_upserts = await asyncio.wait(pending_upserts)
+                    _raise_first_failure(done)
+            finally:
+                # On failure, stop the remaining upserts before the error propagates
+                for task in pending_upserts:
+                    task.cancel()
+                await asyncio.gather(*pending_upserts, return_exceptions=True)
+            
+            if stored:
+                await self.retrieval_cache.invalidate()
+            
+            elapsed = time.perf_counter() - started
+            docs_per_second = stored / elapsed if elapsed > 0 else 0.0
+            logger.info(f"Stored {stored} documents in vector database ({docs_per_second:.1f} docs/s)")
             
-            # Batch upsert to Pinecone
-            batch_size = 100
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i + batch_size]
-                self.index.upsert(vectors=batch)
-            
-            logger.info(f"Stored {len(vectors)} documents in vector database")
+            return {
+                'documents': stored,
+                'seconds': elapsed,
+                'docs_per_second': docs_per_second
+            }
             
         except Exception as e:
             logger.error(f"Failed to store knowledge: {e}")
             raise
     
-    async def retrieve_context(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Retrieve relevant context from vector database"""
+    async def delete_knowledge(self, ids: List[str]):
+        """Remove documents from the vector and lexical indexes"""
+        try:
+            await self.vector_store.adelete(ids)
+            self.lexical_index.remove_documents(ids)
+            await self.retrieval_cache.invalidate()
+            logger.info(f"Deleted {len(ids)} documents from vector database")
+            
+        except Exception as e:
+            logger.error(f"Failed to delete knowledge: {e}")
+            raise
+    
+    def _snapshots_enabled(self) -> bool:
+        return settings.KNOWLEDGE_SNAPSHOT_DIR is not None and isinstance(self.vector_store, LocalVectorStore)
+    
+    def _open_snapshot(self, version: Optional[str] = None) -> Optional[KnowledgeSnapshot]:
+        if not self._snapshots_enabled():
+            return None
         try:
-            # Generate query embedding
-            query_embedding = await self.embed_text(query)
-            
-            # Search in Pinecone
-            results = self.index.query(
-                vector=query_embedding.tolist(),
-                top_k=top_k,
-                include_metadata=True
+            snapshot = open_snapshot(settings.KNOWLEDGE_SNAPSHOT_DIR, version)
+        except Exception as e:
+            logger.error(f"Failed to open knowledge snapshot: {e}")
+            return None
+        
+        if snapshot is not None and snapshot.embedding_namespace != self.embedding_cache.model_name:
+            logger.warning(
+                f"Ignoring knowledge snapshot {snapshot.version}: built with "
+                f"{snapshot.embedding_namespace}, serving {self.embedding_cache.model_name}"
             )
+            return None
+        return snapshot
+    
+    async def sync_lexical_index(self) -> int:
+        """Rebuild BM25 from the bundled knowledge base plus every ingested chunk
+        
+        The lexical index lives in each process, while ingested documents land
+        in the shared vector store. Chunks ingested by the CLI or another
+        worker are recorded with their lexical fields in the knowledge_chunks
+        manifest, so this brings the lexical side back in line with the vector
+        side. It runs at startup; already running workers pick up later
+        ingests on restart, or via snapshot swaps with the local backend.
+        """
+        if self.snapshot_version is not None:
+            # A snapshot already carries every document
+            return len(self.lexical_index)
+        
+        documents = list(load_knowledge_documents())
+        try:
+            async for chunk in get_knowledge_chunks_collection().find({"document": {"$exists": True}}, {"document": 1}):
+                documents.append({**chunk["document"], 'id': chunk["_id"]})
+        except RuntimeError:
+            logger.warning("Database not available, lexical index holds the bundled knowledge base only")
+        
+        lexical_index = BM25Index()
+        await asyncio.to_thread(lexical_index.add_documents, documents)
+        self.lexical_index = lexical_index
+        self.hybrid_retriever.lexical_index = lexical_index
+        logger.info(f"Lexical index rebuilt with {len(lexical_index)} documents")
+        return len(lexical_index)
+    
+    async def seed_local_knowledge(self) -> int:
+        """Embed the bundled knowledge base into an empty local vector store
+        
+        Pinecone and published snapshots already hold it, but a local store
+        without a snapshot starts empty: its vector side would return nothing
+        and the first snapshot it publishes would lack the bundled documents.
+        """
+        if not isinstance(self.vector_store, LocalVectorStore) or self.snapshot_version is not None or len(self.vector_store):
+            return 0
+        
+        stored = await self.store_knowledge(load_knowledge_documents())
+        logger.info(f"Seeded local vector store with {stored['documents']} bundled documents")
+        return stored['documents']
+    
+    def _apply_snapshot(self, snapshot: KnowledgeSnapshot):
+        lexical_index = BM25Index()
+        lexical_index.add_documents(snapshot.documents())
+        self.vector_store.load_snapshot(snapshot)
+        self.lexical_index = lexical_index
+        self.hybrid_retriever.lexical_index = lexical_index
+        self.snapshot_version = snapshot.version
+    
+    async def reload_snapshot(self) -> bool:
+        """Swap to the published snapshot if its version changed"""
+        if not self._snapshots_enabled():
+            return False
+        
+        version = current_version(settings.KNOWLEDGE_SNAPSHOT_DIR)
+        if version is None or version == self.snapshot_version:
+            return False
+        
+        snapshot = await asyncio.to_thread(self._open_snapshot, version)
+        if snapshot is None:
+            return False
+        
+        # The lexical index rebuild happens off the event loop; both swaps are reference assignments
+        await asyncio.to_thread(self._apply_snapshot, snapshot)
+        await self.retrieval_cache.invalidate()
+        logger.info(f"Swapped to knowledge snapshot {version}")
+        return True
+    
+    async def publish_snapshot(self) -> Optional[str]:
+        """Write the local index as a new snapshot version for other workers"""
+        if not self._snapshots_enabled():
+            return None
+        
+        matrix, ids, metadata = self.vector_store.export()
+        version = await asyncio.to_thread(
+            write_snapshot,
+            settings.KNOWLEDGE_SNAPSHOT_DIR,
+            ids,
+            matrix,
+            metadata,
+            self.embedding_cache.model_name
+        )
+        await asyncio.to_thread(prune_snapshots, settings.KNOWLEDGE_SNAPSHOT_DIR, settings.KNOWLEDGE_SNAPSHOT_KEEP)
+        self.snapshot_version = version
+        return version
+    
+    async def retrieve_context(
+        self,
+        query: str,
+        top_k: int = 5,
+        concerns: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Retrieve relevant context from vector database
+        
+        With concerns (categories or tags), the search is first limited to
+        matching documents; if that yields fewer than top_k results, or its
+        best cosine similarity is below RETRIEVAL_FILTER_MIN_SCORE (in both
+        vector and hybrid mode), an unfiltered search fills in or takes over.
+        """
+        try:
+            concerns = normalize_concerns(concerns) if settings.RETRIEVAL_FILTER_BY_CONCERNS else []
+            filters = {'concerns': concerns} if concerns else None
+            
+            cached, generation = await self.retrieval_cache.get(query, top_k, filters)
+            if cached is not None:
+                return cached
             
-            # Extract relevant documents
-            contexts = []
-            for match in results['matches']:
-                contexts.append({
-                    'content': match['metadata'].get('content', ''),
-                    'category': match['metadata'].get('category', ''),
-                    'score': match['score'],
-                    'source': match['metadata'].get('source', '')
-                })
+            contexts = await self._retrieve(query, top_k, concerns or None)
+            if concerns:
+                # Gate on cosine relevance, which hybrid results carry through rank fusion
+                min_score = settings.RETRIEVAL_FILTER_MIN_SCORE
+                if needs_fallback(contexts, top_k, min_score):
+                    unfiltered = await self._retrieve(query, top_k)
+                    contexts = with_fallback(contexts, unfiltered, top_k, min_score)
+            
+            if generation is not None:
+                await self.retrieval_cache.set(query, top_k, contexts, generation, filters)
             
             return contexts
             
@@ -164,6 +374,29 @@ class RAGEngine:
             logger.error(f"Failed to retrieve context: {e}")
             return []
     
+    async def _retrieve(self, query: str, top_k: int, concerns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        if settings.RETRIEVAL_MODE == "hybrid":
+            return await self.hybrid_retriever.retrieve(query, top_k=top_k, concerns=concerns)
+        
+        # Generate query embedding
+        query_embedding = await self.embed_text(query)
+        
+        # Search in the vector store
+        matches = await self.vector_store.aquery(query_embedding.tolist(), top_k=top_k, concerns=concerns)
+        
+        # Extract relevant documents
+        contexts = []
+        for match in matches:
+            contexts.append({
+                'content': match['metadata'].get('content', ''),
+                'category': match['metadata'].get('category', ''),
+                'score': match['score'],
+                'relevance': match['score'],
+                'source': match['metadata'].get('source', '')
+            })
+        
+        return contexts
+    
     async def generate_response(
         self,
         user_message: str,
@@ -173,8 +406,8 @@ class RAGEngine:
     ) -> Dict[str, Any]:
         """Generate therapeutic response using RAG"""
         try:
-            # Retrieve relevant context
-            contexts = await self.retrieve_context(user_message)
+            # Retrieve relevant context, focused on the user's known concerns
+            contexts = await self.retrieve_context(user_message, concerns=concerns_from_context(user_context))
             
             # Build context string
             context_str = "\n\n".join([
@@ -225,13 +458,13 @@ class RAGEngine:
             Response:"""
             
             # Generate response
-            response = self.llm.generate_content(prompt)
+            response = await self.llm.generate(prompt)
             
             # Extract therapeutic elements
-            therapeutic_elements = await self._extract_therapeutic_elements(response.text)
+            therapeutic_elements = await self._extract_therapeutic_elements(response)
             
             return {
-                'response': response.text,
+                'response': response,
                 'contexts_used': contexts,
                 'therapeutic_elements': therapeutic_elements,
                 'is_crisis_response': is_crisis
@@ -270,11 +503,11 @@ class RAGEngine:
                 "call_to_action": ""
             }}"""
             
-            result = self.llm.generate_content(prompt)
+            result = await self.llm.generate(prompt)
             
             # Parse JSON from response
             try:
-                elements = json.loads(result.text)
+                elements = json.loads(result)
             except:
                 elements = {
                     "technique": "empathetic listening",
@@ -290,49 +523,63 @@ class RAGEngine:
             logger.error(f"Failed to extract therapeutic elements: {e}")
             return {}
     
-    async def analyze_conversation_mood(self, messages: List[str]) -> Dict[str, Any]:
-        """Analyze mood progression in conversation"""
+    async def analyze_conversation_mood(
+        self,
+        messages: List[Any],
+        enrich: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Analyze mood progression in conversation
+        
+        Trajectory, dominant emotions and risk come from the stored
+        per-message scores (or local scoring of plain strings). With enrich,
+        the LLM adds progress indicators and interventions on top.
+        """
         try:
-            messages_text = "\n".join([f"Message {i+1}: {msg}" for i, msg in enumerate(messages)])
+            analysis = conversation_analyzer.analyze(messages)
+        except Exception as e:
+            logger.error(f"Failed to analyze mood: {e}")
+            return {}
+        
+        if enrich is None:
+            enrich = settings.CONVERSATION_ANALYSIS_LLM_ENRICHMENT
+        if not enrich or not messages:
+            return analysis
+        
+        try:
+            messages_text = "\n".join([
+                f"Message {i+1}: {msg.get('content', '') if isinstance(msg, dict) else msg}"
+                for i, msg in enumerate(messages)
+            ])
             
-            prompt = f"""Analyze the emotional progression in this conversation:
+            prompt = f"""Review this conversation and an automated mood analysis of it:
             
             {messages_text}
             
+            Mood trajectory: {analysis['mood_trajectory']}
+            Dominant emotions: {', '.join(analysis['dominant_emotions']) or 'none'}
+            Risk score (0-10): {analysis['risk_score']}
+            
             Provide:
-            1. Overall mood trajectory (improving, declining, stable)
-            2. Dominant emotions detected
-            3. Risk indicators (0-10 scale)
-            4. Therapeutic progress indicators
-            5. Recommended interventions
+            1. Therapeutic progress indicators
+            2. Recommended interventions
             
             Format as JSON:
             {{
-                "mood_trajectory": "",
-                "dominant_emotions": [],
-                "risk_score": 0,
                 "progress_indicators": [],
                 "recommended_interventions": []
             }}"""
             
-            response = self.llm.generate_content(prompt)
-            
-            try:
-                analysis = json.loads(response.text)
-            except:
-                analysis = {
-                    "mood_trajectory": "unknown",
-                    "dominant_emotions": [],
-                    "risk_score": 0,
-                    "progress_indicators": [],
-                    "recommended_interventions": []
-                }
-            
-            return analysis
+            enrichment = json.loads(await self.llm.generate(prompt))
+            for key in ("progress_indicators", "recommended_interventions"):
+                for item in enrichment.get(key) or []:
+                    if item not in analysis[key]:
+                        analysis[key].append(item)
+            analysis["source"] = "local+llm"
             
         except Exception as e:
-            logger.error(f"Failed to analyze mood: {e}")
-            return {}
+            logger.warning(f"Conversation analysis enrichment failed: {e}")
+        
+        return analysis
     
     async def generate_therapeutic_exercise(self, concern: str, difficulty: str = "beginner") -> Dict[str, Any]:
         """Generate personalized therapeutic exercise"""
@@ -350,12 +597,12 @@ class RAGEngine:
             
             Format as a practical, easy-to-follow exercise."""
             
-            response = self.llm.generate_content(prompt)
+            response = await self.llm.generate(prompt)
             
             return {
                 'concern': concern,
                 'difficulty': difficulty,
-                'exercise': response.text,
+                'exercise': response,
                 'generated_at': 'now'
             }
             
@@ -363,5 +610,40 @@ class RAGEngine:
             logger.error(f"Failed to generate exercise: {e}")
             return {}
 
-# Singleton instance
-rag_engine = RAGEngine()
\ No newline at end of file
+# Singleton instance, built on first use or by warmup
+_rag_engine: Optional[RAGEngine] = None
+_rag_engine_lock = threading.Lock()
+
+def get_rag_engine() -> RAGEngine:
+    """Get the RAG engine, constructing it on first use"""
+    global _rag_engine
+    if _rag_engine is None:
+        with _rag_engine_lock:
+            if _rag_engine is None:
+                _rag_engine = RAGEngine()
+    return _rag_engine
+
+async def warmup_rag_engine() -> RAGEngine:
+    """Construct the RAG engine in a worker thread so startup I/O can overlap
+    
+    A local vector store with no snapshot is then seeded with the bundled
+    knowledge base.
+    """
+    engine = await asyncio.to_thread(get_rag_engine)
+    await engine.seed_local_knowledge()
+    return engine
+
+async def reload_rag_snapshot() -> bool:
+    """Pick up a newly published snapshot, if the engine has been built"""
+    if _rag_engine is None:
+        return False
+    return await _rag_engine.reload_snapshot()
+
+async def sync_rag_lexical_index() -> int:
+    """Bring the lexical index in line with ingested chunks, if the engine has been built"""
+    if _rag_engine is None:
+        return 0
+    return await _rag_engine.sync_lexical_index()
+
+# Polls for snapshots published by ingestion
+snapshot_watcher = SnapshotWatcher(reload_rag_snapshot)
\ No newline at end of file
@@ -0,0 +1,117 @@
+from typing import List, Dict, Any, Optional, Tuple
+from loguru import logger
+from app.core.config import settings
+from app.core.database import get_redis
+from app.rag.embedding_cache import normalize_text
+import hashlib
+import json
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query; trailing punctuation is dropped"""
+    return normalize_text(text).casefold().rstrip(" .!?")
+
+class RetrievalCache:
+    """Redis TTL cache of retrieval results.
+    
+    Entries are keyed by normalized query, top_k, metadata filters and
+    retrieval mode. Each entry records the knowledge-base generation it was
+    computed against; `invalidate` bumps the generation, so every entry
+    written before a knowledge-base change is treated as a miss. The entry
+    and the current generation are read in a single MGET, and results are
+    written back under the generation read before retrieval started, so a
+    concurrent invalidation can never be masked.
+    """
+    
+    REDIS_PREFIX = "retcache"
+    
+    def __init__(self):
+        self.enabled = settings.RETRIEVAL_CACHE_ENABLED
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+    
+    @property
+    def _generation_key(self) -> str:
+        return f"{self.REDIS_PREFIX}:generation"
+    
+    def key(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps({
+            'query': normalize_query(query),
+            'top_k': top_k,
+            'filters': filters or {},
+            'mode': settings.RETRIEVAL_MODE
+        }, sort_keys=True)
+        return f"{self.REDIS_PREFIX}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+    
+    async def get(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[int]]:
+        """(cached contexts or None, current generation or None if uncacheable)"""
+        redis = get_redis()
+        if not self.enabled or redis is None:
+            return None, None
+        
+        try:
+            encoded, generation = await redis.mget(self.key(query, top_k, filters), self._generation_key)
+        except Exception as e:
+            logger.warning(f"Retrieval cache read failed: {e}")
+            return None, None
+        
+        generation = int(generation or 0)
+        if encoded:
+            entry = json.loads(encoded)
+            if entry['generation'] == generation:
+                self.hits += 1
+                return entry['contexts'], generation
+            self.stale += 1
+        
+        self.misses += 1
+        return None, generation
+    
+    async def set(
+        self,
+        query: str,
+        top_k: int,
+        contexts: List[Dict[str, Any]],
+        generation: int,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Store contexts computed against the given knowledge-base generation"""
+        redis = get_redis()
+        if not self.enabled or redis is None:
+            return
+        
+        try:
+            await redis.set(
+                self.key(query, top_k, filters),
+                json.dumps({'generation': generation, 'contexts': contexts}),
+                ex=settings.RETRIEVAL_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Retrieval cache write failed: {e}")
+    
+    async def invalidate(self):
+        """Mark every cached result as stale after the knowledge base changes"""
+        redis = get_redis()
+        if redis is None:
+            return
+        
+        try:
+            generation = await redis.incr(self._generation_key)
+            logger.info(f"Retrieval cache invalidated (generation {generation})")
+        except Exception as e:
+            logger.warning(f"Retrieval cache invalidation failed: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -1,30 +1,25 @@
-import google.generativeai as genai
 from typing import List, Dict, Any, Optional
 from loguru import logger
 from app.core.config import settings
+from app.rag.llm_providers import create_llm_provider
+from app.rag.lexical_index import BM25Index, load_knowledge_documents
+from app.rag.filters import best_relevance, concerns_from_context, normalize_concerns, needs_fallback, with_fallback
 import json
 import asyncio
+import threading
 from concurrent.futures import ThreadPoolExecutor
 
 class SimpleRAGEngine:
     def __init__(self):
-        # Initialize Gemini
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.llm = genai.GenerativeModel(settings.MODEL)
+        # Initialize the LLM provider (Gemini, or the offline stub)
+        self.llm = create_llm_provider()
         
         # Thread pool for CPU-bound operations
         self.executor = ThreadPoolExecutor(max_workers=2)
         
-        # Simple knowledge base
-        self.knowledge_base = {
-            "anxiety": "Deep breathing exercises can help manage anxiety. Try the 4-7-8 technique: Inhale for 4 counts, hold for 7 counts, exhale for 8 counts.",
-            "depression": "Behavioral activation is effective for depression. Start small: schedule one pleasant activity daily, even if you don't feel like it.",
-            "mindfulness": "Mindfulness meditation reduces stress. Sit comfortably, focus on your breath, observe thoughts without judgment.",
-            "cbt": "Cognitive restructuring helps challenge negative thoughts. Ask: Is this thought based on facts? What evidence supports it?",
-            "grounding": "The 5-4-3-2-1 grounding technique: 5 things you see, 4 things you touch, 3 things you hear, 2 things you smell, 1 thing you taste.",
-            "sleep": "Good sleep hygiene: consistent sleep schedule, avoid screens before bed, keep bedroom cool and dark, limit caffeine.",
-            "crisis": "If you're in crisis, reach out immediately: Call 988 (Suicide & Crisis Lifeline), Text HOME to 741741, or call 911.",
-        }
+        # Knowledge base with a BM25 index built once at startup
+        self.lexical_index = BM25Index()
+        self.lexical_index.add_documents(load_knowledge_documents())
         
         # System prompts
         self.system_prompts = {
@@ -52,21 +47,44 @@ class SimpleRAGEngine:
             Stay calm, supportive, and focus on safety."""
         }
     
-    async def retrieve_context(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-        """Simple context retrieval from knowledge base"""
-        query_lower = query.lower()
-        contexts = []
+    async def retrieve_context(
+        self,
+        query: str,
+        top_k: int = 3,
+        concerns: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """BM25 context retrieval from knowledge base
         
-        for topic, content in self.knowledge_base.items():
-            if topic in query_lower:
-                contexts.append({
-                    'content': content,
-                    'category': topic,
-                    'score': 0.8,  # Simulated relevance score
-                    'source': 'built_in_knowledge'
-                })
+        With concerns, matching categories and tags are searched first. BM25
+        scores have no absolute scale, so the filtered results count as weak
+        when their best score is below RETRIEVAL_FILTER_MIN_LEXICAL_RATIO of
+        the best unfiltered score; the unfiltered ranking then takes over.
+        Otherwise unfiltered matches fill any remaining slots.
+        """
+        concerns = normalize_concerns(concerns) if settings.RETRIEVAL_FILTER_BY_CONCERNS else []
         
-        return contexts[:top_k]
+        contexts = self._search(query, top_k, concerns or None)
+        if concerns:
+            # Both searches are in-process, so the comparison is cheap
+            unfiltered = self._search(query, top_k)
+            best = best_relevance(unfiltered)
+            min_score = settings.RETRIEVAL_FILTER_MIN_LEXICAL_RATIO * best if best else None
+            if needs_fallback(contexts, top_k, min_score):
+                contexts = with_fallback(contexts, unfiltered, top_k, min_score)
+        
+        return contexts
+    
+    def _search(self, query: str, top_k: int, concerns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return [
+            {
+                'content': doc['content'],
+                'category': doc.get('category', 'general'),
+                'score': score,
+                'relevance': score,
+                'source': doc.get('source', 'built_in_knowledge')
+            }
+            for doc, score in self.lexical_index.search(query, top_k=top_k, concerns=concerns)
+        ]
     
     async def generate_response(
         self,
@@ -77,8 +95,8 @@ class SimpleRAGEngine:
     ) -> Dict[str, Any]:
         """Generate therapeutic response"""
         try:
-            # Retrieve relevant context
-            contexts = await self.retrieve_context(user_message)
+            # Retrieve relevant context, focused on the user's known concerns
+            contexts = await self.retrieve_context(user_message, concerns=concerns_from_context(user_context))
             
             # Build context string
             context_str = "\n\n".join([
@@ -132,10 +150,10 @@ class SimpleRAGEngine:
             Make the response visually organized and easy to read."""
             
             # Generate response
-            response = self.llm.generate_content(prompt)
+            response = await self.llm.generate(prompt)
             
             return {
-                'response': response.text,
+                'response': response,
                 'contexts_used': contexts,
                 'therapeutic_elements': {
                     'technique': 'empathetic listening',
@@ -170,12 +188,12 @@ class SimpleRAGEngine:
             
             Format as a practical, easy-to-follow exercise."""
             
-            response = self.llm.generate_content(prompt)
+            response = await self.llm.generate(prompt)
             
             return {
                 'concern': concern,
                 'difficulty': difficulty,
-                'exercise': response.text,
+                'exercise': response,
                 'generated_at': 'now'
             }
             
@@ -188,5 +206,19 @@ class SimpleRAGEngine:
                 'generated_at': 'now'
             }
 
-# Singleton instance
-simple_rag_engine = SimpleRAGEngine()
\ No newline at end of file
+# Singleton instance, built on first use or by warmup
+_simple_rag_engine: Optional[SimpleRAGEngine] = None
+_simple_rag_engine_lock = threading.Lock()
+
+def get_simple_rag_engine() -> SimpleRAGEngine:
+    """Get the simple RAG engine, constructing it on first use"""
+    global _simple_rag_engine
+    if _simple_rag_engine is None:
+        with _simple_rag_engine_lock:
+            if _simple_rag_engine is None:
+                _simple_rag_engine = SimpleRAGEngine()
+    return _simple_rag_engine
+
+async def warmup_simple_rag_engine() -> SimpleRAGEngine:
+    """Construct the simple RAG engine in a worker thread so startup I/O can overlap"""
+    return await asyncio.to_thread(get_simple_rag_engine)
\ No newline at end of file
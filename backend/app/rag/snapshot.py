@@ -0,0 +1,242 @@
+"""Versioned, memory-mapped knowledge-base snapshots.
+
+A snapshot directory looks like
+
+    <root>/CURRENT                       name of the live version
+    <root>/versions/<version>/manifest.json
+    <root>/versions/<version>/embeddings.npy    float32, L2-normalised rows
+    <root>/versions/<version>/<column>.bin      UTF-8 values, concatenated
+    <root>/versions/<version>/<column>.idx.npy  int64 offsets into .bin
+
+Everything is opened with mmap, so every worker on a host shares one
+page-cache copy and only touches the rows a query returns. Version
+directories are immutable: a new one is written under a temporary name,
+renamed into place, and then CURRENT is replaced atomically. Workers that
+still map an older version keep a valid view until they swap.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from loguru import logger
+from app.core.config import settings
+import numpy as np
+import asyncio
+import json
+import os
+import shutil
+
+METADATA_COLUMNS = ('content', 'category', 'source', 'type', 'tags', 'keywords')
+LIST_COLUMNS = ('tags', 'keywords')
+TAG_SEPARATOR = "\x1f"
+CURRENT_FILE = "CURRENT"
+
+class StringColumn(Sequence[str]):
+    """Memory-mapped column of strings: a UTF-8 blob plus row offsets"""
+    
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+    
+    @classmethod
+    def open(cls, directory: Path, name: str) -> "StringColumn":
+        offsets = np.load(directory / f"{name}.idx.npy", mmap_mode="r")
+        blob_path = directory / f"{name}.bin"
+        # np.memmap cannot map an empty file
+        blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if blob_path.stat().st_size else np.zeros(0, dtype=np.uint8)
+        return cls(blob, offsets)
+    
+    @staticmethod
+    def write(directory: Path, name: str, values: Sequence[str]):
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        with open(directory / f"{name}.bin", "wb") as f:
+            for value in encoded:
+                f.write(value)
+        np.save(directory / f"{name}.idx.npy", offsets)
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+    
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self[row]
+    
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+class SnapshotMetadata(Sequence[Dict[str, Any]]):
+    """Row metadata decoded on access from the snapshot's columns"""
+    
+    def __init__(self, columns: Dict[str, StringColumn]):
+        self._columns = columns
+    
+    def __len__(self) -> int:
+        return len(self._columns['content'])
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield self[row]
+    
+    def _list(self, column: str, row: int) -> List[str]:
+        # Snapshots written before a column existed simply lack it
+        if column not in self._columns:
+            return []
+        joined = self._columns[column][row]
+        return joined.split(TAG_SEPARATOR) if joined else []
+    
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        return {
+            'content': self._columns['content'][row],
+            'category': self._columns['category'][row],
+            'source': self._columns['source'][row],
+            'type': self._columns['type'][row],
+            'tags': self._list('tags', row),
+            'keywords': self._list('keywords', row)
+        }
+    
+    def partition_fields(self) -> Iterator[Dict[str, Any]]:
+        """Category and tags per row, without decoding content"""
+        for row in range(len(self)):
+            yield {'category': self._columns['category'][row], 'tags': self._list('tags', row)}
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    version: str
+    path: Path
+    matrix: np.ndarray
+    ids: StringColumn
+    metadata: SnapshotMetadata
+    embedding_namespace: str
+    
+    def documents(self) -> Iterator[Dict[str, Any]]:
+        """Rows as knowledge documents, for rebuilding the lexical index"""
+        for row in range(len(self.ids)):
+            yield {**self.metadata[row], 'id': self.ids[row]}
+
+def _versions_dir(root: Path) -> Path:
+    return Path(root) / "versions"
+
+def current_version(root: Path) -> Optional[str]:
+    """Version named by CURRENT, or None if no snapshot was published"""
+    try:
+        return (Path(root) / CURRENT_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+def write_snapshot(
+    root: Path,
+    ids: Sequence[str],
+    matrix: np.ndarray,
+    metadata: Sequence[Dict[str, Any]],
+    embedding_namespace: str
+) -> str:
+    """Write and publish a new snapshot version, returning its name"""
+    root = Path(root)
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    final = _versions_dir(root) / version
+    staging = _versions_dir(root) / f".{version}.tmp"
+    staging.mkdir(parents=True)
+    
+    np.save(staging / "embeddings.npy", np.ascontiguousarray(matrix, dtype=np.float32))
+    StringColumn.write(staging, "ids", list(ids))
+    for column in METADATA_COLUMNS:
+        if column in LIST_COLUMNS:
+            values = [TAG_SEPARATOR.join(meta.get(column) or []) for meta in metadata]
+        else:
+            values = [str(meta.get(column) or '') for meta in metadata]
+        StringColumn.write(staging, column, values)
+    
+    with open(staging / "manifest.json", "w") as f:
+        json.dump({
+            'version': version,
+            'count': len(ids),
+            'dimension': int(matrix.shape[1]),
+            'embedding_namespace': embedding_namespace,
+            'columns': list(METADATA_COLUMNS),
+            'created_at': datetime.utcnow().isoformat()
+        }, f)
+    
+    os.rename(staging, final)
+    
+    # Publish: replacing CURRENT is atomic, so readers see the old or the new version
+    pointer = root / f".{CURRENT_FILE}.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, root / CURRENT_FILE)
+    
+    logger.info(f"Published knowledge snapshot {version} ({len(ids)} vectors)")
+    return version
+
+def open_snapshot(root: Path, version: Optional[str] = None) -> Optional[KnowledgeSnapshot]:
+    """Map a snapshot version (default: CURRENT) without copying it into memory"""
+    version = version or current_version(root)
+    if version is None:
+        return None
+    
+    path = _versions_dir(root) / version
+    with open(path / "manifest.json") as f:
+        manifest = json.load(f)
+    
+    return KnowledgeSnapshot(
+        version=version,
+        path=path,
+        matrix=np.load(path / "embeddings.npy", mmap_mode="r"),
+        ids=StringColumn.open(path, "ids"),
+        metadata=SnapshotMetadata({column: StringColumn.open(path, column) for column in manifest['columns']}),
+        embedding_namespace=manifest['embedding_namespace']
+    )
+
+def prune_snapshots(root: Path, keep: int):
+    """Delete all but the newest `keep` versions (never the current one)"""
+    versions_dir = _versions_dir(root)
+    if not versions_dir.is_dir():
+        return
+    
+    current = current_version(root)
+    versions = sorted(p.name for p in versions_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for version in versions[:-keep] if keep > 0 else versions:
+        if version != current:
+            # Workers still mapping it keep their view until they swap
+            shutil.rmtree(versions_dir / version, ignore_errors=True)
+
+class SnapshotWatcher:
+    """Poll CURRENT and hand new versions to a reload callback"""
+    
+    def __init__(self, reload: Callable[[], Awaitable[bool]]):
+        self.reload = reload
+        self._watch_task: Optional[asyncio.Task] = None
+    
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Knowledge snapshot reload failed: {e}")
+    
+    def start_watching(self):
+        """Start polling the snapshot directory in the background"""
+        interval = settings.KNOWLEDGE_SNAPSHOT_RELOAD_INTERVAL_SECONDS
+        if settings.KNOWLEDGE_SNAPSHOT_DIR is None or interval <= 0 or self._watch_task is not None:
+            return
+        self._watch_task = asyncio.create_task(self._watch(interval))
+        logger.info(f"Watching knowledge snapshots in {settings.KNOWLEDGE_SNAPSHOT_DIR} every {interval}s")
+    
+    async def stop_watching(self):
+        """Stop the background poller"""
+        if self._watch_task is None:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
@@ -0,0 +1,307 @@
+from typing import List, Dict, Any, Callable, Iterable, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from loguru import logger
+from app.core.config import settings
+from app.rag.filters import document_concerns, pinecone_filter
+import numpy as np
+import asyncio
+import threading
+
+class VectorStore(ABC):
+    """Retrieval backend used by RAGEngine.
+    
+    Vectors are dicts with `id`, `values` and `metadata`; query matches are
+    dicts with `id`, `score` and `metadata`, mirroring Pinecone's shape.
+    """
+    
+    name: str = "base"
+    
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        """Insert or replace vectors by id"""
+    
+    @abstractmethod
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 5,
+        concerns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the top_k most similar vectors with metadata
+        
+        With concerns, only vectors whose category or tags include one of
+        them are searched.
+        """
+    
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Remove vectors by id"""
+    
+    _executor: Optional[ThreadPoolExecutor] = None
+    
+    async def _run(self, func: Callable, *args, **kwargs):
+        """Run a blocking call in this store's bounded pool with a timeout
+        
+        A timed-out call is abandoned, not interrupted; the pool size caps how
+        many can be outstanding at once.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.VECTOR_STORE_MAX_CONCURRENCY,
+                thread_name_prefix=f"vector-{self.name}"
+            )
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, partial(func, *args, **kwargs)),
+            timeout=settings.VECTOR_STORE_TIMEOUT_SECONDS
+        )
+    
+    async def aupsert(self, vectors: List[Dict[str, Any]]):
+        """Upsert without blocking the event loop"""
+        await self._run(self.upsert, vectors)
+    
+    async def aquery(
+        self,
+        vector: Sequence[float],
+        top_k: int = 5,
+        concerns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Query without blocking the event loop"""
+        return await self._run(self.query, vector, top_k, concerns)
+    
+    async def adelete(self, ids: List[str]):
+        """Delete without blocking the event loop"""
+        await self._run(self.delete, ids)
+
+class PineconeVectorStore(VectorStore):
+    """Remote Pinecone serverless index"""
+    
+    name = "pinecone"
+    
+    # Pinecone caps request size, so larger upserts are split
+    MAX_UPSERT_VECTORS = 100
+    MAX_DELETE_IDS = 1000
+    
+    def __init__(self, dimension: int):
+        from pinecone import Pinecone
+        
+        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+        self.dimension = dimension
+        self._initialize_index()
+    
+    def _initialize_index(self):
+        """Initialize Pinecone index"""
+        from pinecone import ServerlessSpec
+        
+        try:
+            # Check if index exists
+            existing_indexes = self.pc.list_indexes()
+            
+            if settings.PINECONE_INDEX not in [idx.name for idx in existing_indexes]:
+                # Create index
+                self.pc.create_index(
+                    name=settings.PINECONE_INDEX,
+                    dimension=self.dimension,
+                    metric='cosine',
+                    spec=ServerlessSpec(
+                        cloud='aws',
+                        region='us-east-1'
+                    )
+                )
+                logger.info(f"Created Pinecone index: {settings.PINECONE_INDEX}")
+            
+            self.index = self.pc.Index(settings.PINECONE_INDEX)
+        
+        except Exception as e:
+            logger.error(f"Failed to initialize Pinecone: {e}")
+            raise
+    
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        for i in range(0, len(vectors), self.MAX_UPSERT_VECTORS):
+            self.index.upsert(vectors=vectors[i:i + self.MAX_UPSERT_VECTORS])
+    
+    async def aupsert(self, vectors: List[Dict[str, Any]]):
+        # Request-sized chunks go out in parallel, bounded by the pool
+        await asyncio.gather(*[
+            self._run(self.index.upsert, vectors=vectors[i:i + self.MAX_UPSERT_VECTORS])
+            for i in range(0, len(vectors), self.MAX_UPSERT_VECTORS)
+        ])
+    
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 5,
+        concerns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        results = self.index.query(
+            vector=list(vector),
+            top_k=top_k,
+            include_metadata=True,
+            filter=pinecone_filter(concerns) if concerns else None
+        )
+        return [
+            {'id': match['id'], 'score': match['score'], 'metadata': match.get('metadata') or {}}
+            for match in results['matches']
+        ]
+    
+    def delete(self, ids: List[str]):
+        for i in range(0, len(ids), self.MAX_DELETE_IDS):
+            self.index.delete(ids=ids[i:i + self.MAX_DELETE_IDS])
+
+class LocalVectorStore(VectorStore):
+    """In-process exact cosine search over a NumPy matrix.
+    
+    Sized for thousands to tens of thousands of documents: a query is one
+    matrix-vector product with no network hop. Rows are L2-normalised on
+    insert so cosine similarity reduces to a dot product. Writers rebuild the
+    matrix under a lock and publish it as a single tuple, so readers never
+    see a half-applied upsert.
+    
+    Each snapshot also carries a partition per category and tag (the row
+    numbers holding it), so a concern-filtered query scores only those rows.
+    """
+    
+    name = "local"
+    
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._snapshot: Tuple[np.ndarray, List[str], List[Dict[str, Any]], Dict[str, np.ndarray]] = (
+            np.zeros((0, dimension), dtype=np.float32), [], [], {}
+        )
+    
+    def __len__(self) -> int:
+        return len(self._snapshot[1])
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    @staticmethod
+    def _partition(metadata: Iterable[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        rows: Dict[str, List[int]] = {}
+        for row, meta in enumerate(metadata):
+            for key in document_concerns(meta):
+                rows.setdefault(key, []).append(row)
+        return {key: np.asarray(members, dtype=np.intp) for key, members in rows.items()}
+    
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        if not vectors:
+            return
+        
+        incoming = self._normalize(np.asarray([v['values'] for v in vectors], dtype=np.float32))
+        if incoming.shape[1] != self.dimension:
+            raise ValueError(f"Expected dimension {self.dimension}, got {incoming.shape[1]}")
+        
+        with self._lock:
+            matrix, ids, metadata, _ = self._snapshot
+            positions = {doc_id: row for row, doc_id in enumerate(ids)}
+            matrix = matrix.copy()
+            ids = list(ids)
+            metadata = list(metadata)
+            
+            new_rows = []
+            for vector, row_values in zip(vectors, incoming):
+                row = positions.get(vector['id'])
+                if row is None:
+                    positions[vector['id']] = len(ids)
+                    ids.append(vector['id'])
+                    metadata.append(vector.get('metadata') or {})
+                    new_rows.append(row_values)
+                elif row < len(matrix):
+                    matrix[row] = row_values
+                    metadata[row] = vector.get('metadata') or {}
+                else:
+                    # Duplicate id within this same batch
+                    new_rows[row - len(matrix)] = row_values
+                    metadata[row] = vector.get('metadata') or {}
+            
+            if new_rows:
+                matrix = np.vstack([matrix, np.asarray(new_rows, dtype=np.float32)])
+            
+            self._snapshot = (matrix, ids, metadata, self._partition(metadata))
+    
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 5,
+        concerns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        matrix, ids, metadata, partitions = self._snapshot
+        if not ids or top_k <= 0:
+            return []
+        
+        rows = None
+        if concerns:
+            members = [partitions[key] for key in concerns if key in partitions]
+            if not members:
+                return []
+            rows = np.unique(np.concatenate(members))
+            matrix = matrix[rows]
+        
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        scores = matrix @ query
+        
+        k = min(top_k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        
+        results = []
+        for position in top:
+            row = rows[position] if rows is not None else position
+            results.append({'id': ids[row], 'score': float(scores[position]), 'metadata': metadata[row]})
+        return results
+    
+    def load_snapshot(self, snapshot):
+        """Serve a memory-mapped KnowledgeSnapshot; later upserts copy on write"""
+        if snapshot.matrix.shape[1] != self.dimension:
+            raise ValueError(f"Snapshot dimension {snapshot.matrix.shape[1]} does not match {self.dimension}")
+        partitions = self._partition(snapshot.metadata.partition_fields())
+        with self._lock:
+            self._snapshot = (snapshot.matrix, snapshot.ids, snapshot.metadata, partitions)
+    
+    def export(self) -> Tuple[np.ndarray, Sequence[str], Sequence[Dict[str, Any]]]:
+        """Current matrix, ids and metadata, for writing a snapshot"""
+        matrix, ids, metadata, _ = self._snapshot
+        return matrix, ids, metadata
+    
+    async def aquery(
+        self,
+        vector: Sequence[float],
+        top_k: int = 5,
+        concerns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        # A single in-memory matrix product; cheaper inline than a thread hop
+        return self.query(vector, top_k, concerns)
+    
+    def delete(self, ids: List[str]):
+        doomed = set(ids)
+        if not doomed:
+            return
+        
+        with self._lock:
+            matrix, current_ids, metadata, _ = self._snapshot
+            keep = [row for row, doc_id in enumerate(current_ids) if doc_id not in doomed]
+            metadata = [metadata[row] for row in keep]
+            self._snapshot = (
+                matrix[keep],
+                [current_ids[row] for row in keep],
+                metadata,
+                self._partition(metadata)
+            )
+
+def create_vector_store(dimension: int, backend: Optional[str] = None) -> VectorStore:
+    """Build the retrieval backend selected in settings"""
+    backend = backend or settings.VECTOR_BACKEND
+    if backend == "local":
+        return LocalVectorStore(dimension)
+    if backend == "pinecone":
+        return PineconeVectorStore(dimension)
+    raise ValueError(f"Unknown vector backend: {backend}")
@@ -0,0 +1,193 @@
+"""Embedding backend benchmark: torch SentenceTransformer vs int8 ONNX Runtime.
+
+Each backend runs in its own subprocess so model load time and peak RSS are
+not polluted by the other. Reports load time, peak RSS, single-query p50/p99
+latency, batched throughput, and agreement of the ONNX vectors with the
+torch vectors (per-text cosine and top-5 neighbour overlap over the corpus).
+
+Usage (from backend/; the ONNX model must be exported first, see
+app/rag/embedders.py):
+    python -m benchmarks.bench_embeddings --output bench_embeddings.json
+"""
+from typing import Dict, List, Any
+from datetime import datetime
+from pathlib import Path
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_mood_detector import NEUTRAL_SENTENCES, CRISIS_SENTENCES, _percentile, _git_commit
+
+BACKENDS = ("torch", "onnx")
+
+def generate_corpus(size: int, seed: int = 42) -> List[str]:
+    """Knowledge-base passages plus deterministic synthetic chat messages"""
+    from app.rag.lexical_index import load_knowledge_documents
+    
+    rng = random.Random(seed)
+    texts = [doc['content'] for doc in load_knowledge_documents()]
+    pool = NEUTRAL_SENTENCES + CRISIS_SENTENCES
+    while len(texts) < size:
+        texts.append(" ".join(rng.choice(pool) for _ in range(rng.randint(1, 4))))
+    return texts[:size]
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_worker(backend: str, corpus_path: Path, output_path: Path, repeat: int, batch_size: int) -> Dict[str, Any]:
+    """Measure one backend; embeddings are saved to output_path for comparison"""
+    from app.rag.embedders import create_embedder
+    
+    texts = json.loads(corpus_path.read_text())
+    rss_before = _peak_rss_mb()
+    
+    started = time.perf_counter()
+    embedder = create_embedder(backend=backend)
+    load_seconds = time.perf_counter() - started
+    
+    # Warm up
+    embedder.encode(texts[:8], batch_size=batch_size)
+    
+    latencies = []
+    for _ in range(repeat):
+        for text in texts[:200]:
+            call_start = time.perf_counter_ns()
+            embedder.encode(text)
+            latencies.append(time.perf_counter_ns() - call_start)
+    latencies.sort()
+    
+    started = time.perf_counter()
+    for _ in range(repeat):
+        embeddings = embedder.encode(texts, batch_size=batch_size)
+    batch_seconds = (time.perf_counter() - started) / repeat
+    
+    np.save(output_path, np.asarray(embeddings, dtype=np.float32))
+    
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+        "rss_before_load_mb": rss_before,
+        "single_p50_ms": _percentile(latencies, 50) / 1e6,
+        "single_p99_ms": _percentile(latencies, 99) / 1e6,
+        "batch_texts_per_second": len(texts) / batch_seconds if batch_seconds > 0 else 0.0,
+        "dimension": int(embeddings.shape[1]),
+    }
+
+def agreement(reference: np.ndarray, candidate: np.ndarray, k: int = 5) -> Dict[str, float]:
+    """Per-text cosine between backends and overlap of each text's top-k neighbours"""
+    def normalize(matrix):
+        return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+    
+    reference, candidate = normalize(reference), normalize(candidate)
+    cosines = (reference * candidate).sum(axis=1)
+    
+    def neighbours(matrix):
+        scores = matrix @ matrix.T
+        np.fill_diagonal(scores, -np.inf)
+        return np.argsort(-scores, axis=1)[:, :k]
+    
+    overlap = [
+        len(set(a) & set(b)) / k
+        for a, b in zip(neighbours(reference), neighbours(candidate))
+    ]
+    return {
+        "cosine_mean": float(cosines.mean()),
+        "cosine_min": float(cosines.min()),
+        f"top{k}_neighbour_overlap": float(np.mean(overlap)),
+    }
+
+def run(size: int, repeat: int, batch_size: int, seed: int) -> Dict[str, Any]:
+    """Benchmark every backend in a subprocess and compare their vectors"""
+    corpus = generate_corpus(size, seed)
+    results = {}
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus_path = Path(workdir) / "corpus.json"
+        corpus_path.write_text(json.dumps(corpus))
+        
+        for backend in BACKENDS:
+            output_path = Path(workdir) / f"{backend}.npy"
+            completed = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.bench_embeddings",
+                    "--worker", backend,
+                    "--corpus", str(corpus_path),
+                    "--embeddings", str(output_path),
+                    "--repeat", str(repeat),
+                    "--batch-size", str(batch_size),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                results[backend] = {"error": (completed.stderr.strip().splitlines() or ["no output"])[-1]}
+                continue
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+        
+        comparison = None
+        if all("error" not in results[backend] for backend in BACKENDS):
+            comparison = agreement(
+                np.load(Path(workdir) / "torch.npy"),
+                np.load(Path(workdir) / "onnx.npy"),
+            )
+    
+    return {
+        "benchmark": "embeddings",
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "corpus_size": len(corpus),
+        "repeat": repeat,
+        "batch_size": batch_size,
+        "seed": seed,
+        "results": results,
+        "agreement": comparison,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000, help="texts in the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_embeddings.json", help="JSON results path")
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--embeddings", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.corpus, args.embeddings, args.repeat, args.batch_size)))
+        return
+    
+    report = run(args.size, args.repeat, args.batch_size, args.seed)
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    for backend, stats in report["results"].items():
+        if "error" in stats:
+            print(f"{backend:<6} failed: {stats['error']}")
+            continue
+        print(
+            f"{backend:<6} load {stats['load_seconds']:>6.2f}s  rss {stats['peak_rss_mb']:>7.0f}MB"
+            f"  p50 {stats['single_p50_ms']:>6.2f}ms  p99 {stats['single_p99_ms']:>6.2f}ms"
+            f"  {stats['batch_texts_per_second']:>8.0f} texts/s"
+        )
+    if report["agreement"]:
+        print("agreement " + "  ".join(f"{k} {v:.4f}" for k, v in report["agreement"].items()))
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Throughput benchmark for MoodDetector and CrisisInterventionSystem.
+
+Scores a generated synthetic corpus (short/long x neutral/crisis-dense) and
+reports messages per second, p50/p99 latency and peak bytes allocated per call
+for the full `detect_mood` / `assess_crisis` paths and for `_detect_emotions`,
+`_detect_crisis_level` and the VADER call on their own.
+
+Usage (from backend/):
+    python -m benchmarks.bench_mood_detector --output bench_mood.json
+"""
+from typing import Dict, List, Any, Callable
+from datetime import datetime
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+from app.mental_health.mood_detector import MoodDetector, CrisisInterventionSystem
+
+NEUTRAL_SENTENCES = [
+    "I went to the store this morning and picked up some groceries.",
+    "Work was fairly ordinary today, a few meetings and some emails.",
+    "We talked about the weekend plans over dinner.",
+    "The weather has been mild so I took a walk around the block.",
+    "I have been reading a book about the history of the city.",
+    "My sister called and we caught up on family news.",
+    "I cleaned the kitchen and did the laundry after lunch.",
+    "The train was a little late but the commute was fine.",
+]
+
+CRISIS_SENTENCES = [
+    "I feel hopeless and worthless and I can't go on like this.",
+    "Sometimes I think everyone would be better off dead without me.",
+    "I am so anxious and scared, I feel alone and trapped.",
+    "I hate myself and everything is falling apart.",
+    "I keep thinking I want to die and there is no point in living.",
+    "I'm overwhelmed, exhausted, numb and empty inside.",
+    "It's unbearable, I just want to give up.",
+    "I'm depressed, nobody cares and I feel like a burden.",
+]
+
+CORPUS_SHAPES = {
+    # name: (sentences per message, share of crisis sentences)
+    "short_neutral": (1, 0.0),
+    "short_crisis": (1, 1.0),
+    "long_neutral": (60, 0.0),
+    "long_crisis": (60, 0.3),
+}
+
+def generate_corpus(size: int, seed: int = 42) -> Dict[str, List[str]]:
+    """Deterministic synthetic messages for each corpus shape"""
+    rng = random.Random(seed)
+    corpus = {}
+    
+    for name, (sentences, crisis_share) in CORPUS_SHAPES.items():
+        messages = []
+        for _ in range(size):
+            parts = []
+            for _ in range(sentences):
+                pool = CRISIS_SENTENCES if rng.random() < crisis_share else NEUTRAL_SENTENCES
+                parts.append(rng.choice(pool))
+            messages.append(" ".join(parts))
+        corpus[name] = messages
+    
+    return corpus
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def measure(func: Callable[[str], Any], messages: List[str], repeat: int) -> Dict[str, float]:
+    """Time func over messages, then measure allocations in a separate traced pass"""
+    # Warm up caches and lazy state
+    for message in messages[:10]:
+        func(message)
+    
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            call_start = time.perf_counter_ns()
+            func(message)
+            latencies.append(time.perf_counter_ns() - call_start)
+    elapsed = time.perf_counter() - started
+    
+    # Allocation tracing distorts timings, so it runs on its own
+    peaks = []
+    tracemalloc.start()
+    try:
+        for message in messages:
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func(message)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(max(peak - baseline, 0))
+    finally:
+        tracemalloc.stop()
+    
+    latencies.sort()
+    calls = len(latencies)
+    return {
+        "calls": calls,
+        "messages_per_second": calls / elapsed if elapsed > 0 else 0.0,
+        "p50_us": _percentile(latencies, 50) / 1000.0,
+        "p99_us": _percentile(latencies, 99) / 1000.0,
+        "mean_us": sum(latencies) / calls / 1000.0 if calls else 0.0,
+        "peak_alloc_bytes_per_call": sum(peaks) / len(peaks) if peaks else 0.0,
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+def run(size: int, repeat: int, seed: int) -> Dict[str, Any]:
+    """Run every target against every corpus shape"""
+    detector = MoodDetector()
+    crisis = CrisisInterventionSystem()
+    corpus = generate_corpus(size, seed)
+    
+    targets = {
+        "detect_mood": detector.detect_mood,
+        "assess_crisis": crisis.assess_crisis,
+        "_detect_emotions": lambda text: detector._detect_emotions(text.lower()),
+        "_detect_crisis_level": lambda text: detector._detect_crisis_level(text.lower()),
+        "vader_polarity_scores": detector.sentiment_analyzer.polarity_scores,
+    }
+    
+    results = {}
+    for shape, messages in corpus.items():
+        avg_chars = sum(len(m) for m in messages) / len(messages)
+        results[shape] = {
+            "avg_chars": avg_chars,
+            "targets": {name: measure(func, messages, repeat) for name, func in targets.items()},
+        }
+    
+    return {
+        "benchmark": "mood_detector",
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "lexicon_version": detector.lexicon.version,
+        "corpus_size": size,
+        "repeat": repeat,
+        "seed": seed,
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200, help="messages per corpus shape")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over each corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_mood.json", help="JSON results path")
+    args = parser.parse_args()
+    
+    report = run(args.size, args.repeat, args.seed)
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    for shape, data in report["results"].items():
+        print(f"{shape} ({data['avg_chars']:.0f} chars)")
+        for name, stats in data["targets"].items():
+            print(
+                f"  {name:<24} {stats['messages_per_second']:>10.0f} msg/s"
+                f"  p50 {stats['p50_us']:>9.1f}us  p99 {stats['p99_us']:>9.1f}us"
+                f"  {stats['peak_alloc_bytes_per_call']:>9.0f} B/call"
+            )
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
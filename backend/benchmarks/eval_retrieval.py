@@ -0,0 +1,250 @@
+"""Offline retrieval quality and latency evaluation.
+
+Runs the labeled queries in benchmarks/data/retrieval_eval.json against each
+local retrieval backend and reports recall@k, MRR, p50/p99 latency and
+memory. Nothing touches the network: the vector backends use LocalVectorStore
+and a locally cached embedding model (set HF_HUB_OFFLINE=1 to be sure).
+
+Backends:
+    substring  the original SimpleRAGEngine topic-substring matcher (baseline)
+    bm25       BM25Index, as used by SimpleRAGEngine.retrieve_context
+    vector     LocalVectorStore cosine search, as RAGEngine in vector mode
+    hybrid     HybridRetriever (BM25 + vector, RRF), as RAGEngine in hybrid mode
+
+Usage (from backend/):
+    python -m benchmarks.eval_retrieval --output eval_retrieval.json
+    python -m benchmarks.eval_retrieval --backends substring bm25 --distractors 5000
+"""
+from typing import Awaitable, Callable, Dict, List, Any, Optional
+from datetime import datetime
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+from benchmarks.bench_mood_detector import NEUTRAL_SENTENCES, _percentile, _git_commit
+from benchmarks.bench_embeddings import _peak_rss_mb
+from app.rag.lexical_index import BM25Index, load_knowledge_documents
+
+DEFAULT_FIXTURE = Path(__file__).parent / "data" / "retrieval_eval.json"
+BACKENDS = ("substring", "bm25", "vector", "hybrid")
+
+Search = Callable[[str, int], Awaitable[List[str]]]
+
+def load_fixture(path: Path = DEFAULT_FIXTURE) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["queries"]
+
+def generate_distractors(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Off-topic documents that grow the corpus without adding relevant answers"""
+    rng = random.Random(seed)
+    return [
+        {
+            'id': f"distractor_{i}",
+            'content': " ".join(rng.choice(NEUTRAL_SENTENCES) for _ in range(rng.randint(2, 5))),
+            'category': 'general',
+            'tags': []
+        }
+        for i in range(count)
+    ]
+
+def build_substring(documents: List[Dict[str, Any]], embedder=None) -> Search:
+    # Baseline: a document matches when its category name appears in the query
+    topics = [(doc['category'].replace('_', ' '), doc['id']) for doc in documents]
+    
+    async def search(query: str, top_k: int) -> List[str]:
+        query_lower = query.lower()
+        return [doc_id for topic, doc_id in topics if topic in query_lower][:top_k]
+    return search
+
+def build_bm25(documents: List[Dict[str, Any]], embedder=None) -> Search:
+    index = BM25Index()
+    index.add_documents(documents)
+    
+    async def search(query: str, top_k: int) -> List[str]:
+        return [doc['id'] for doc, _ in index.search(query, top_k=top_k)]
+    return search
+
+def _local_store(documents: List[Dict[str, Any]], embedder):
+    from app.rag.vector_store import LocalVectorStore
+    
+    embeddings = embedder.encode([doc['content'] for doc in documents], batch_size=64)
+    store = LocalVectorStore(embedder.get_sentence_embedding_dimension())
+    store.upsert([
+        {'id': doc['id'], 'values': embedding, 'metadata': doc}
+        for doc, embedding in zip(documents, embeddings)
+    ])
+    return store
+
+def _embed_fn(embedder):
+    async def embed(text: str):
+        return embedder.encode(text)
+    return embed
+
+def build_vector(documents: List[Dict[str, Any]], embedder=None) -> Search:
+    store = _local_store(documents, embedder)
+    embed = _embed_fn(embedder)
+    
+    async def search(query: str, top_k: int) -> List[str]:
+        embedding = await embed(query)
+        return [match['id'] for match in await store.aquery(embedding, top_k=top_k)]
+    return search
+
+def build_hybrid(documents: List[Dict[str, Any]], embedder=None) -> Search:
+    from app.rag.hybrid_retriever import HybridRetriever
+    
+    index = BM25Index()
+    index.add_documents(documents)
+    retriever = HybridRetriever(index, _local_store(documents, embedder), _embed_fn(embedder))
+    content_ids = {doc['content']: doc['id'] for doc in documents}
+    
+    async def search(query: str, top_k: int) -> List[str]:
+        contexts = await retriever.retrieve(query, top_k=top_k)
+        return [content_ids[ctx['content']] for ctx in contexts]
+    return search
+
+BUILDERS = {
+    "substring": build_substring,
+    "bm25": build_bm25,
+    "vector": build_vector,
+    "hybrid": build_hybrid,
+}
+
+NEEDS_EMBEDDER = {"vector", "hybrid"}
+
+def score(ranked: List[str], relevant: List[str], k: int) -> Dict[str, float]:
+    """recall@k and reciprocal rank of the first relevant document"""
+    relevant_set = set(relevant)
+    hits = relevant_set.intersection(ranked[:k])
+    reciprocal_rank = next((1.0 / rank for rank, doc_id in enumerate(ranked, start=1) if doc_id in relevant_set), 0.0)
+    return {"recall": len(hits) / len(relevant_set), "reciprocal_rank": reciprocal_rank}
+
+async def evaluate(search: Search, queries: List[Dict[str, Any]], k: int, repeat: int) -> Dict[str, float]:
+    """Quality over the fixture, then latency and per-query allocations"""
+    recalls, reciprocal_ranks = [], []
+    for item in queries:
+        result = score(await search(item['query'], k), item['relevant'], k)
+        recalls.append(result['recall'])
+        reciprocal_ranks.append(result['reciprocal_rank'])
+    
+    latencies = []
+    for _ in range(repeat):
+        for item in queries:
+            started = time.perf_counter_ns()
+            await search(item['query'], k)
+            latencies.append(time.perf_counter_ns() - started)
+    latencies.sort()
+    
+    peaks = []
+    tracemalloc.start()
+    try:
+        for item in queries:
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await search(item['query'], k)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(max(peak - baseline, 0))
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        f"recall@{k}": sum(recalls) / len(recalls),
+        "mrr": sum(reciprocal_ranks) / len(reciprocal_ranks),
+        "p50_ms": _percentile(latencies, 50) / 1e6,
+        "p99_ms": _percentile(latencies, 99) / 1e6,
+        "peak_alloc_bytes_per_query": sum(peaks) / len(peaks) if peaks else 0.0,
+    }
+
+def _build(name: str, documents: List[Dict[str, Any]], embedder) -> tuple:
+    """Build a backend, measuring the memory its index retains"""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        search = BUILDERS[name](documents, embedder)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return search, max(after - before, 0)
+
+async def run(
+    backends: List[str],
+    k: int,
+    repeat: int,
+    distractors: int,
+    seed: int,
+    embedding_backend: Optional[str],
+    fixture: Path
+) -> Dict[str, Any]:
+    """Evaluate every requested backend over the same corpus and fixture"""
+    queries = load_fixture(fixture)
+    documents = load_knowledge_documents() + generate_distractors(distractors, seed)
+    
+    embedder = None
+    embedder_error = None
+    if NEEDS_EMBEDDER.intersection(backends):
+        try:
+            from app.rag.embedders import create_embedder
+            embedder = create_embedder(backend=embedding_backend)
+        except Exception as e:
+            embedder_error = f"{type(e).__name__}: {e}"
+    
+    results = {}
+    for name in backends:
+        if name in NEEDS_EMBEDDER and embedder is None:
+            results[name] = {"skipped": f"embedding model unavailable ({embedder_error})"}
+            continue
+        search, index_bytes = _build(name, documents, embedder)
+        results[name] = {**await evaluate(search, queries, k, repeat), "index_bytes": index_bytes}
+    
+    return {
+        "benchmark": "retrieval_eval",
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "queries": len(queries),
+        "documents": len(documents),
+        "k": k,
+        "repeat": repeat,
+        "seed": seed,
+        "embedding_backend": embedding_backend,
+        "peak_rss_mb": _peak_rss_mb(),
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("-k", type=int, default=3, help="cutoff for recall@k")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes over the queries")
+    parser.add_argument("--distractors", type=int, default=0, help="off-topic documents added to the corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embedding-backend", choices=("torch", "onnx"), default=None)
+    parser.add_argument("--fixture", type=Path, default=DEFAULT_FIXTURE)
+    parser.add_argument("--output", default="eval_retrieval.json", help="JSON results path")
+    args = parser.parse_args()
+    
+    report = asyncio.run(run(
+        args.backends, args.k, args.repeat, args.distractors, args.seed, args.embedding_backend, args.fixture
+    ))
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    print(f"{report['queries']} queries over {report['documents']} documents, k={args.k}")
+    for name, stats in report["results"].items():
+        if "skipped" in stats:
+            print(f"  {name:<10} skipped: {stats['skipped']}")
+            continue
+        print(
+            f"  {name:<10} recall@{args.k} {stats[f'recall@{args.k}']:.3f}  mrr {stats['mrr']:.3f}"
+            f"  p50 {stats['p50_ms']:>7.3f}ms  p99 {stats['p99_ms']:>7.3f}ms"
+            f"  index {stats['index_bytes'] / 1024:>8.0f}KiB"
+        )
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()